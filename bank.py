@@ -0,0 +1,208 @@
+
+import heapq
+import math
+
+import engine
+import tracing
+from stats import RunningStats
+
+
+class CarEvents:
+    '''Stands in for a car's EventQueue: the car's events go straight onto
+    the bank's heap, tagged with the car number. A car never has more than
+    one event pending, so (time, kind, car number) orders them uniquely.'''
+
+    def __init__(self, heap, number):
+        self.heap = heap
+        self.number = number
+
+    def push(self, time, kind, data=None):
+        heapq.heappush(self.heap, (time, kind, self.number, data))
+
+
+class Car(engine.Simulation):
+    '''One car of a Bank.
+
+    Runs the single-car driver with any engine.Strategy, so the car keeps
+    that strategy's choice of floors and the usual car cycle, but its halls
+    only hold the hall calls the bank's dispatcher assigned to it. It is
+    finished once the bank has no arrivals left, its halls are empty and
+    its strategy is done with the passengers onboard (the random elevator
+    stops as soon as everyone has boarded). A car with nothing to do parks
+    instead of sleeping until the next arrival, and the bank wakes it when
+    it is given a call.
+    '''
+
+    def __init__(self, bank, number, passenger_list, strategy, tracer=None):
+        super().__init__(passenger_list, bank.capacity, bank.elevator_speed, \
+                         bank.loading_rate, tracer, strategy)
+        self.bank = bank
+        self.number = number
+        self.name = "{} car {}".format(self.name, number + 1)
+        self.idle_since = None       #time the car parked, None while busy
+        self.unboarded = 0           #assigned to this car, not yet boarded
+        self.events = CarEvents(bank.heap, number)
+        self.handlers = {engine.DOOR_OPEN: self.on_door_open, \
+                         engine.LOAD: self.on_load, \
+                         engine.DEPART: self.on_depart, \
+                         engine.ARRIVE: self.on_arrive}
+
+    def finished(self):
+        return self.bank.next_arrival == len(self.arrival) and not self.halls \
+               and self.strategy.finished(self)
+
+    def pass_deadline(self):
+        #the dispatcher reads the car's floor at every call, so a moving car
+        #stops at the last floor it passes before each arrival, as it would
+        #floor by floor (the half floor to spare absorbs rounding)
+        bank = self.bank
+        if bank.next_arrival < len(bank.arrival):
+            return bank.arrival[bank.next_arrival] - 1.5 * self.elevator_speed
+        return math.inf
+
+    def on_depart(self, time, woke):
+        if not self.halls and self.onboard_count == 0:
+            #nothing assigned to this car, park until the dispatcher calls it
+            self.current_time = time
+            self.idle_since = time
+            return
+        super().on_depart(time, woke)
+
+
+class EtaDispatcher:
+    '''Give each hall call to the car that could get there soonest, roughly:
+    travel time from the car's floor plus the time to load and unload the
+    passengers it already has. Ties go to the lower-numbered car.'''
+
+    def assign(self, bank, floor):
+        best = None
+        for car in bank.cars:
+            eta = abs(car.current_floor - floor) * bank.elevator_speed + \
+                  (car.waiting_count + car.onboard_count) * 2 * bank.loading_rate
+            if best is None or eta < best[0]:
+                best = eta, car
+        return best[1]
+
+
+class RoundRobinDispatcher:
+    '''Give hall calls to the cars in turn'''
+
+    def __init__(self):
+        self.turn = 0
+
+    def assign(self, bank, floor):
+        car = bank.cars[self.turn % len(bank.cars)]
+        self.turn += 1
+        return car
+
+
+# Group dispatchers by name
+DISPATCHERS = {"eta": EtaDispatcher, "round_robin": RoundRobinDispatcher}
+
+
+class Bank:
+    '''A bank of cars sharing the hall calls of one passenger workload.
+
+    Arrivals are taken in time order from the shared passenger table. A
+    passenger joining a floor whose hall call is still open waits for the
+    car already serving it; otherwise the dispatcher assigns the new call
+    to a car, which costs O(cars). Each car then runs the policy strategy
+    (a key of engine.STRATEGIES), and the bank merges the cars' events in
+    time order. run() returns the same
+    (total time, moves, wait statistics) as a single-car simulation: the
+    time the last car finished, the moves of all cars and the merged wait
+    statistics of every car. A one-car bank behaves exactly like its
+    single-car simulation.
+    '''
+
+    def __init__(self, passenger_list, cars, capacity, elevator_speed, \
+                 loading_rate, policy="strategy", dispatcher="eta", tracer=None):
+        self.capacity = capacity
+        self.elevator_speed = elevator_speed
+        self.loading_rate = loading_rate
+        self.name = "{} bank".format(policy)
+        self.tracer = tracer
+        self.dispatcher = DISPATCHERS[dispatcher]()
+        self.next_arrival = 0
+        self.calls = {}              #floor -> car serving its hall call
+        self.heap = []               #every car's pending event
+
+        #the first car's strategy prepares the passenger table (the optimal
+        #strategy drops passengers who stay on their floor), the rest share it
+        self.cars = []
+        for number in range(cars):
+            car_tracer = None
+            if tracer is not None:
+                car_tracer = tracing.Tracer(tracer.level)
+                car_tracer.run = tracer.run
+            self.cars.append(Car(self, number, passenger_list, \
+                                 engine.STRATEGIES[policy](), car_tracer))
+            passenger_list = self.cars[0].passengers
+        self.passengers = passenger_list
+        self.arrival = memoryview(self.passengers.arrival)
+        self.source = memoryview(self.passengers.source)
+
+    def run(self):
+        ''' Run the bank and return the total time, the number of elevator
+        moves and the wait time statistics (a RunningStats) '''
+
+        self.passengers.clear_times()
+        if len(self.arrival):
+            for car in self.cars:
+                car.events.push(0, engine.DOOR_OPEN)
+
+        arrival = self.arrival
+        end = len(arrival)
+        heap = self.heap
+        while True:
+            if self.next_arrival < end and \
+                    (not heap or arrival[self.next_arrival] <= heap[0][0]):
+                self.call(self.next_arrival)
+                self.next_arrival += 1
+                continue
+            if not heap:
+                break
+            time, kind, number, data = heapq.heappop(heap)
+            self.cars[number].handlers[kind](time, data)
+
+        wait_stats = RunningStats()
+        for car in self.cars:
+            wait_stats.merge(car.wait_stats)
+        total_time = max(car.current_time for car in self.cars) if self.cars else 0
+        elevator_moves = sum(car.elevator_moves for car in self.cars)
+
+        if self.tracer is not None:
+            #one car after the other, so each car's moves stay together
+            for car in self.cars:
+                move_rows, summary_rows = car.tracer.records()
+                if self.tracer.summary:
+                    summary_rows.append((self.tracer.run, car.name, \
+                        car.current_time, car.elevator_moves, \
+                        car.wait_stats.mean, car.wait_stats.count))
+                self.tracer.extend((move_rows, summary_rows))
+            if self.tracer.summary:
+                self.tracer.add_summary((self.tracer.run, self.name, total_time, \
+                    elevator_moves, wait_stats.mean, wait_stats.count))
+
+        return total_time, elevator_moves, wait_stats
+
+    def call(self, index):
+        '''Hand an arriving passenger to the car serving their floor'''
+
+        floor = self.source[index]
+        car = self.calls.get(floor)
+        if car is None or floor not in car.halls:
+            car = self.dispatcher.assign(self, floor)
+            self.calls[floor] = car
+        car.halls[floor].append(index)
+        car.waiting_floors |= 1 << floor
+        car.waiting_count += 1
+        car.unboarded += 1
+        if car.directional:
+            car.add_call(index)
+
+        if car.idle_since is not None:
+            #wake the parked car on its one-second tick, as a single car would
+            idle = max(1, math.ceil(self.arrival[index] - car.idle_since))
+            car.events.push(car.idle_since + idle, engine.DEPART, True)
+            car.idle_since = None
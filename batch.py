@@ -0,0 +1,442 @@
+
+
+import numpy
+
+import engine
+from passengers import PassengerTable
+from stats import RunningStats
+
+
+# Where a car is in its cycle
+LOAD = 0     # doors open, waiting passengers board
+DEPART = 1   # choosing the next floor, or sleeping until an arrival
+ARRIVE = 2   # travelling to the target, then unloading
+
+WINDOW = 8   # arrivals compared at a time when releasing passengers
+
+# Strategies a batch can run
+STRATEGIES = ("random", "strategy", "optimal")
+
+# SplitMix64 constants, for the per-round random streams
+GOLDEN = numpy.uint64(0x9E3779B97F4A7C15)
+MIX1 = numpy.uint64(0xBF58476D1CE4E5B9)
+MIX2 = numpy.uint64(0x94D049BB133111EB)
+
+
+def _mix(z):
+    '''SplitMix64 finalizer of an array of uint64'''
+
+    with numpy.errstate(over="ignore"):
+        z = (z ^ (z >> numpy.uint64(30))) * MIX1
+        z = (z ^ (z >> numpy.uint64(27))) * MIX2
+    return z ^ (z >> numpy.uint64(31))
+
+
+def _expand(starts, counts):
+    '''Concatenation of the ranges start .. start + count - 1'''
+
+    offsets = numpy.cumsum(counts) - counts
+    return numpy.repeat(starts - offsets, counts) + numpy.arange(counts.sum())
+
+
+class BatchSimulation:
+    '''Many independent single-car runs of one strategy advanced in lockstep.
+
+    Instead of one Python event loop per round, the state of every round
+    lives in NumPy arrays indexed by round: car floor, time, moves,
+    passengers onboard per destination floor and hall queues per floor.
+    Each step every unfinished car does one whole car cycle (choose the
+    next floor or sleep, travel and unload, load) as array operations
+    across all rounds, so the Python cost of a step is shared by the whole
+    batch. Hall queues are kept as head and tail pointers into the
+    passengers sorted by round, floor and arrival, so they stay FIFO.
+
+    The cycle, tie-breaks and times follow engine.Simulation exactly. By
+    default random choices come from a counter-based stream per round,
+    hashed from the round's key and how many draws it has made, so every
+    round's draws are made for the whole batch at once and do not depend on
+    which other rounds share the batch. Given rngs instead (one
+    random.Random per round) they are drawn one by one with the calls the
+    strategy makes, and a round of the strategy or optimal elevator then
+    ends with the same time, moves and waits as engine.Simulation given the
+    same random stream; this is slower and meant for checking. The random
+    elevator picks among floors in floor order rather than the engine's
+    hall order, so its rounds are only ever equal in distribution. Only the
+    STRATEGIES above are supported, and nothing is traced move by move.
+    '''
+
+    def __init__(self, workloads, capacity, strategy="strategy", keys=None, \
+                 rngs=None):
+        ''' workloads: one (passenger_list, elevator_speed, loading_rate)
+        per round, as from workload.generate_passengers. keys: an integer
+        per round seeding its random stream (default: the round's index) '''
+
+        if strategy not in STRATEGIES:
+            raise ValueError("the {} elevator cannot run batched".format(strategy))
+        self.strategy = engine.STRATEGIES[strategy]()
+        self.name = self.strategy.name
+        self.choose = {"random": self.choose_random, \
+                       "strategy": self.choose_nearest, \
+                       "optimal": self.choose_optimal}[self.name]
+        self.collective = self.strategy.collective
+        self.capacity = capacity
+        rounds = len(workloads)
+        self.rounds = rounds
+        self.rngs = rngs
+        if keys is None:
+            keys = range(rounds)
+        self.streams = _mix(numpy.array(keys, dtype=numpy.uint64))
+        self.draws = numpy.zeros(rounds, dtype=numpy.uint64)
+
+        tables = [self.strategy.prepare(PassengerTable.from_tuples(passenger_list)) \
+                  for passenger_list, speed, rate in workloads]
+        counts = numpy.array([len(table) for table in tables], dtype=numpy.int64)
+        self.end = numpy.cumsum(counts)          #one past each round's last passenger
+        self.start = self.end - counts
+        self.arrival = numpy.concatenate([table.arrival for table in tables] + \
+                                         [numpy.empty(0)])
+        self.source = numpy.concatenate([table.source for table in tables] + \
+                                        [numpy.empty(0, numpy.int32)]).astype(numpy.int64)
+        self.destination = numpy.concatenate([table.destination for table in tables] + \
+                                             [numpy.empty(0, numpy.int32)]).astype(numpy.int64)
+        self.round_of = numpy.repeat(numpy.arange(rounds), counts)
+        self.speed = numpy.array([speed for p, speed, rate in workloads], dtype=float)
+        self.rate = numpy.array([rate for p, speed, rate in workloads], dtype=float)
+
+        passengers = len(self.arrival)
+        floors = 1
+        if passengers:
+            floors = int(max(self.source.max(), self.destination.max())) + 1
+        self.floors = floors
+        self.floor_numbers = numpy.arange(floors)
+        #distance[a, b] between floors a and b, small to keep scans cheap
+        self.distances = numpy.abs(self.floor_numbers[:, None] - \
+                                   self.floor_numbers).astype(numpy.int16)
+
+        #hall (round, floor) queues hall_order[hall_start + head :] and the
+        #first sizes[round, floor] of those have arrived
+        self.hall = self.round_of * floors + self.source
+        self.hall_order = numpy.lexsort((numpy.arange(passengers), self.source, \
+                                         self.round_of))
+        hall_sizes = numpy.bincount(self.hall, minlength=rounds * floors)
+        self.hall_start = numpy.cumsum(hall_sizes) - hall_sizes
+        self.head = numpy.zeros(rounds * floors, dtype=numpy.int64)
+        self.sizes = numpy.zeros((rounds, floors), dtype=numpy.int64)
+        self.hall_sizes = self.sizes.reshape(-1)     #the same, by hall
+
+        self.cursor = self.start.copy()          #next passenger to arrive
+        self.waiting = numpy.zeros(rounds, dtype=numpy.int64)
+        self.onboard = numpy.zeros((rounds, floors), dtype=numpy.int64)
+        self.onboard_count = numpy.zeros(rounds, dtype=numpy.int64)
+        self.unboarded = counts.copy()
+        self.board_step = numpy.full(passengers, -1, dtype=numpy.int64)
+
+        self.time = numpy.zeros(rounds)
+        self.floor = numpy.zeros(rounds, dtype=numpy.int64)
+        self.target = numpy.zeros(rounds, dtype=numpy.int64)
+        self.moves = numpy.zeros(rounds, dtype=numpy.int64)
+        self.state = numpy.full(rounds, LOAD)
+        self.woke = numpy.zeros(rounds, dtype=bool)
+        self.active = counts > 0
+        self.unloads = []                        #(rounds, floors, step, times)
+
+    def run(self):
+        ''' Run every round and return one (total time, moves, wait time
+        statistics) per round, like engine.Simulation.run() '''
+
+        step = 0
+        while self.active.any():
+            #steps are numbered so a passenger boarding while the car passes
+            #a floor gets off at this cycle's unload, one boarding at the
+            #load at a later one
+            self.depart(numpy.flatnonzero(self.active & (self.state == DEPART)))
+            self.arrive(numpy.flatnonzero(self.active & (self.state == ARRIVE)), \
+                        3 * step)
+            self.load(numpy.flatnonzero(self.active & (self.state == LOAD)), \
+                      3 * step + 2)
+            step += 1
+
+        results = []
+        for r, waits in enumerate(self.wait_times(3 * step)):
+            wait_stats = RunningStats()
+            wait_stats.extend(waits)
+            results.append((float(self.time[r]), int(self.moves[r]), wait_stats))
+        return results
+
+    ############################### CAR CYCLE ##################################
+
+    def release(self, rows):
+        '''Queue everyone who has arrived by each row's time in their hall'''
+
+        window = numpy.arange(WINDOW)
+        last = len(self.arrival) - 1
+        while len(rows):
+            rows = rows[(self.cursor[rows] < self.end[rows]) & \
+                        (self.arrival[numpy.minimum(self.cursor[rows], last)] <= \
+                         self.time[rows])]
+            index = self.cursor[rows][:, None] + window
+            arrived = (index < self.end[rows][:, None]) & \
+                      (self.arrival[numpy.minimum(index, last)] <= \
+                       self.time[rows][:, None])
+            released = arrived.sum(1)
+            numpy.add.at(self.hall_sizes, self.hall[index[arrived]], 1)
+            self.cursor[rows] += released
+            self.waiting[rows] += released
+            rows = rows[released == WINDOW]
+
+    def board(self, rows, step):
+        '''Board passengers waiting at each row's floor up to capacity and
+        return how many got on'''
+
+        hall = rows * self.floors + self.floor[rows]
+        boarding = numpy.minimum(self.hall_sizes[hall], \
+                                 self.capacity - self.onboard_count[rows])
+        boarded = self.hall_order[_expand(self.hall_start[hall] + self.head[hall], \
+                                          boarding)]
+        self.head[hall] += boarding
+        self.hall_sizes[hall] -= boarding
+        numpy.add.at(self.onboard, (self.round_of[boarded], \
+                                    self.destination[boarded]), 1)
+        self.board_step[boarded] = step
+        self.onboard_count[rows] += boarding
+        self.waiting[rows] -= boarding
+        self.unboarded[rows] -= boarding
+        return boarding
+
+    def load(self, rows, step):
+        self.release(rows)
+        self.time[rows] += self.board(rows, step) * self.rate[rows]
+        self.state[rows] = DEPART
+
+    def depart(self, rows):
+        self.release(rows)
+        target = self.choose(rows, self.woke[rows])
+
+        #nobody to serve yet, sleep until the next passenger has arrived
+        sleep = rows[target < 0]
+        idle = numpy.ceil(self.arrival[self.cursor[sleep]] - self.time[sleep])
+        self.time[sleep] += numpy.maximum(1, idle)
+        self.woke[sleep] = True
+
+        go = target >= 0
+        rows, target = rows[go], target[go]
+        self.woke[rows] = False
+        self.target[rows] = target
+        self.state[rows] = ARRIVE
+        if not self.collective:
+            #a collective car moves floor by floor in arrive()
+            self.time[rows] += numpy.abs(target - self.floor[rows]) * self.speed[rows]
+            self.floor[rows] = target
+
+    def arrive(self, rows, step):
+        if self.collective:
+            #pick up anyone waiting at each floor on the way, target included
+            moving = rows[self.floor[rows] != self.target[rows]]
+            while len(moving):
+                self.floor[moving] += numpy.sign(self.target[moving] - \
+                                                 self.floor[moving])
+                self.time[moving] += self.speed[moving]
+                self.release(moving)
+                self.board(moving, step)
+                moving = moving[self.floor[moving] != self.target[moving]]
+        self.release(rows)
+
+        self.moves[rows] += 1
+        leaving = self.onboard[rows, self.floor[rows]]
+        self.onboard[rows, self.floor[rows]] = 0
+        self.onboard_count[rows] -= leaving
+        self.time[rows] += leaving * self.rate[rows]
+        unloaded = leaving > 0
+        self.unloads.append((rows[unloaded], self.floor[rows[unloaded]], step + 1, \
+                             self.time[rows[unloaded]]))
+
+        if self.name == "random":
+            #the random elevator stops as soon as everyone has boarded
+            done = self.unboarded[rows] == 0
+        else:
+            done = (self.unboarded[rows] == 0) & (self.onboard_count[rows] == 0)
+        self.active[rows[done]] = False
+        self.state[rows] = LOAD
+
+    def wait_times(self, steps):
+        '''Wait time of every delivered passenger, one array per round.
+        A passenger gets off at the first unload at their destination after
+        the step they boarded in.'''
+
+        if not self.unloads:
+            return [numpy.empty(0)] * self.rounds
+        rows, floors, step, times = (numpy.concatenate(column) for column in \
+            zip(*[(r, f, numpy.full(len(r), s), t) for r, f, s, t in self.unloads]))
+        stops = rows * self.floors + floors
+        order = numpy.argsort(stops * (steps + 1) + step, kind="stable")
+        keys = (stops * (steps + 1) + step)[order]
+
+        boarded = numpy.flatnonzero(self.board_step >= 0)
+        stop = self.round_of[boarded] * self.floors + self.destination[boarded]
+        found = numpy.searchsorted(keys, stop * (steps + 1) + self.board_step[boarded], \
+                                   side="right")
+        found_ok = found < len(keys)
+        found = numpy.minimum(found, len(keys) - 1)
+        delivered = found_ok & (stops[order][found] == stop)
+        waits = numpy.round(times[order][found[delivered]] - \
+                            self.source[boarded[delivered]], 4)
+        per_round = numpy.bincount(self.round_of[boarded[delivered]], \
+                                   minlength=self.rounds)
+        return numpy.split(waits, numpy.cumsum(per_round)[:-1])
+
+    ############################ DISPATCH DECISIONS ############################
+
+    def _distance(self, rows):
+        return self.distances[self.floor[rows]]
+
+    def _draw(self, rows, totals):
+        '''A random integer below total for each row, from the row's stream'''
+
+        if self.rngs is not None:
+            return numpy.array([self.rngs[r].randrange(total) for r, total in \
+                                zip(rows.tolist(), totals.tolist())], \
+                               dtype=numpy.int64)
+        #SplitMix64 of the stream after its draws so far: 53 bits per draw
+        self.draws[rows] += numpy.uint64(1)
+        with numpy.errstate(over="ignore"):
+            z = _mix(self.streams[rows] + self.draws[rows] * GOLDEN)
+        uniform = (z >> numpy.uint64(11)).astype(float) * 2.0 ** -53
+        return (uniform * totals).astype(numpy.int64)
+
+    def _weighted(self, rows, weights):
+        '''Floor of a passenger picked uniformly at random from per-floor
+        counts, for each row'''
+
+        picks = self._draw(rows, weights.sum(1))
+        return (numpy.cumsum(weights, 1) <= picks[:, None]).sum(1)
+
+    def _earliest(self, rows, floor):
+        '''floor is the lower of the best floors for each row; where the
+        floor as far above the car ties with it (the caller checks sizes),
+        take whichever hall's first passenger arrived first'''
+
+        mirror = 2 * self.floor[rows] - floor
+        line = numpy.arange(len(rows))
+        tie = (mirror > floor) & (mirror < self.floors)
+        tie[tie] = self.sizes[rows[tie], mirror[tie]] > 0
+        return line, mirror, tie
+
+    def _first(self, rows, floor):
+        hall = rows * self.floors + floor
+        return self.hall_order[self.hall_start[hall] + self.head[hall]]
+
+    def _closest_waiting(self, rows):
+        '''Closest floor with anyone waiting, earliest arrival first'''
+
+        sizes = self.sizes[rows]
+        floor = numpy.argmin(numpy.where(sizes > 0, self._distance(rows), \
+                                         self.floors), 1)
+        line, mirror, tie = self._earliest(rows, floor)
+        later = self._first(rows[tie], mirror[tie]) < self._first(rows[tie], floor[tie])
+        floor[numpy.flatnonzero(tie)[later]] = mirror[tie][later]
+        return floor
+
+    def _most_waiting(self, rows):
+        '''Floor with the most people waiting, then the closest, then the
+        earliest arrival'''
+
+        sizes = self.sizes[rows]
+        key = (sizes.max(1)[:, None] - sizes) * (self.floors + 1) + self._distance(rows)
+        floor = numpy.argmin(numpy.where(sizes > 0, key, \
+                                         numpy.iinfo(numpy.int64).max), 1)
+        line, mirror, tie = self._earliest(rows, floor)
+        tie[tie] = self.sizes[rows[tie], mirror[tie]] == sizes[line[tie], floor[tie]]
+        later = self._first(rows[tie], mirror[tie]) < self._first(rows[tie], floor[tie])
+        floor[numpy.flatnonzero(tie)[later]] = mirror[tie][later]
+        return floor
+
+    def _closest_destinations(self, rows):
+        '''Floors below and above the car at the distance of the closest
+        destination onboard, with how many passengers go to each (0 if that
+        floor is not a destination, or is the car's floor counted below)'''
+
+        onboard = self.onboard[rows]
+        current = self.floor[rows]
+        distance = numpy.where(onboard > 0, self.distances[current], \
+                               self.floors).min(1).astype(numpy.int64)
+        lower, upper = current - distance, current + distance
+        line = numpy.arange(len(rows))
+        lower_count = numpy.where(lower >= 0, \
+                                  onboard[line, numpy.maximum(lower, 0)], 0)
+        upper_count = numpy.where((distance > 0) & (upper < self.floors), \
+                                  onboard[line, numpy.minimum(upper, self.floors - 1)], 0)
+        return lower, lower_count, upper, upper_count
+
+    def _pick_closest(self, rows, closest):
+        '''random_floor over the closest destinations, lower floor first'''
+        lower, lower_count, upper, upper_count = closest
+        picks = self._draw(rows, lower_count + upper_count)
+        return numpy.where(picks < lower_count, lower, upper)
+
+    def _choose_waiting(self, rows, woke, target):
+        '''Strategy elevator rules for cars with nobody onboard'''
+
+        here = self.sizes[rows, self.floor[rows]] > 0
+        target[woke & here] = self.floor[rows][woke & here]
+        wake = woke & ~here
+        target[wake] = self._closest_waiting(rows[wake])
+        busiest = ~woke & (self.onboard_count[rows] == 0) & (self.waiting[rows] > 0)
+        target[busiest] = self._most_waiting(rows[busiest])
+
+    def choose_nearest(self, rows, woke):
+        '''Next floor of each row's car (-1 to wait), as NearestStrategy'''
+
+        target = numpy.full(len(rows), -1, dtype=numpy.int64)
+        self._choose_waiting(rows, woke, target)
+
+        riding = ~woke & (self.onboard_count[rows] > 0)
+        closest = self._closest_destinations(rows[riding])
+        lower, lower_count, upper, upper_count = closest
+        only = numpy.where(lower_count > 0, lower, upper)
+        one = ((lower_count == 0) | (upper_count == 0)) & \
+              (lower_count + upper_count == 1)
+        choice = only.copy()
+        draw = ~one
+        choice[draw] = self._pick_closest(rows[riding][draw], \
+                                          [column[draw] for column in closest])
+        target[riding] = choice
+        return target
+
+    def choose_optimal(self, rows, woke):
+        '''Next floor of each row's car (-1 to wait), as OptimalStrategy'''
+
+        target = numpy.full(len(rows), -1, dtype=numpy.int64)
+        self._choose_waiting(rows, woke, target)
+
+        riding = ~woke & (self.onboard_count[rows] > 0)
+        riders = rows[riding]
+        closest = self._closest_destinations(riders)
+        lower, lower_count, upper, upper_count = closest
+        current = self.floor[riders]
+        up = numpy.where(self.floor_numbers > current[:, None], \
+                         self.onboard[riders], 0).sum(1)
+        down = self.onboard_count[riders] - up
+
+        #the same distance above and below: go where most people are going
+        choice = numpy.where(upper_count > lower_count, upper, lower)
+        even = upper_count == lower_count
+        choice[even & (up > down)] = upper[even & (up > down)]
+        tie = even & (up == down) & (lower_count > 0) & (upper_count > 0)
+        choice[tie] = self._pick_closest(riders[tie], [column[tie] for column in closest])
+        single = (lower_count == 0) | (upper_count == 0)
+        choice[single] = numpy.where(lower_count > 0, lower, upper)[single]
+        target[riding] = choice
+        return target
+
+    def choose_random(self, rows, woke):
+        '''Next floor of each row's car (-1 to wait), as RandomStrategy'''
+
+        target = numpy.full(len(rows), -1, dtype=numpy.int64)
+        here = self.sizes[rows, self.floor[rows]] > 0
+        target[woke & here] = self.floor[rows][woke & here]
+
+        riding = ~woke & (self.onboard_count[rows] > 0)
+        target[riding] = self._weighted(rows[riding], self.onboard[rows[riding]])
+        halls = (woke & ~here) | (~woke & ~riding & (self.waiting[rows] > 0))
+        target[halls] = self._weighted(rows[halls], self.sizes[rows[halls]])
+        return target
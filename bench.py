@@ -0,0 +1,173 @@
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+import engine
+import runner
+import workload
+
+
+PASSENGER_COUNTS = [1000, 10000, 100000, 1000000]
+FLOOR_COUNTS = [20, 200]
+CAPACITIES = [5, 20]
+
+# Fields that identify a case, for matching against a baseline
+CASE_FIELDS = ("strategy", "passengers", "floors", "capacity")
+
+
+def cases(strategies, passenger_counts, floor_counts, capacities):
+    '''Every combination, smallest workloads first'''
+
+    return [dict(zip(CASE_FIELDS, (strategy, passengers, floors, capacity))) \
+            for passengers, floors, capacity, strategy in itertools.product(\
+                passenger_counts, floor_counts, capacities, strategies)]
+
+
+def run_case(case, seed, repeat=3, memory=True):
+    '''Time one case and return its measurements. The workload depends only
+    on the seed, the passenger count and the floor count, so every strategy
+    and capacity is timed on the same passengers. The wall time covers the
+    simulation only and is the best of repeat runs; peak memory comes from
+    one more run, workload included, under tracemalloc, which would
+    otherwise slow the timed runs down.'''
+
+    def generate():
+        runner.seed_round(seed, case["passengers"] * 1000 + case["floors"])
+        return workload.generate_passengers(case["floors"], case["passengers"])
+
+    def simulate(passenger_list, elevator_speed, loading_rate):
+        return engine.Simulation(passenger_list, case["capacity"], \
+            elevator_speed, loading_rate, \
+            strategy=engine.STRATEGIES[case["strategy"]]()).run()
+
+    passenger_list, elevator_speed, loading_rate = generate()
+    wall_time = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        tot_time, tot_moves, wait_stats = simulate(passenger_list, \
+            elevator_speed, loading_rate)
+        elapsed = time.perf_counter() - start
+        if wall_time is None or elapsed < wall_time:
+            wall_time = elapsed
+
+    peak_memory = None
+    if memory:
+        del passenger_list, wait_stats
+        tracemalloc.start()
+        simulate(*generate())
+        peak_memory = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return dict(case, wall_time=round(wall_time, 4), \
+                passengers_per_second=round(case["passengers"] / wall_time), \
+                peak_memory_mb=None if peak_memory is None else round(peak_memory, 2), \
+                total_time=tot_time, moves=tot_moves)
+
+
+def compare(results, baseline, tolerance):
+    '''Pair each result with the same case in baseline and return
+    (result, baseline wall time or None, regressed) triples. A case has
+    regressed when it is more than tolerance (a fraction) slower.'''
+
+    previous = {tuple(case[k] for k in CASE_FIELDS): case \
+                for case in baseline["cases"]}
+    rows = []
+    for result in results:
+        old = previous.get(tuple(result[k] for k in CASE_FIELDS))
+        if old is None:
+            rows.append((result, None, False))
+        else:
+            rows.append((result, old["wall_time"], \
+                         result["wall_time"] > old["wall_time"] * (1 + tolerance)))
+    return rows
+
+
+def main(argv=None):
+    ''' Command-line entry point; returns the process exit code '''
+
+    parser = argparse.ArgumentParser(description="Time the elevator "
+                                     "simulations over a grid of workloads.")
+    parser.add_argument("--strategy", nargs="+", choices=sorted(engine.STRATEGIES),
+                        default=["random", "strategy", "optimal"])
+    parser.add_argument("--passengers", type=int, nargs="+", \
+                        default=PASSENGER_COUNTS)
+    parser.add_argument("--floors", type=int, nargs="+", default=FLOOR_COUNTS)
+    parser.add_argument("--capacity", type=int, nargs="+", default=CAPACITIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, \
+                        help="timed runs per case, the fastest counts (default 3)")
+    parser.add_argument("--no-memory", action="store_true", \
+                        help="skip the peak memory measurement")
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--baseline", help="earlier --out file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, \
+                        help="slowdown that counts as a regression "
+                        "(default 0.2, i.e. 20%%)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.tolerance < 0 or \
+       min(args.passengers + args.floors + args.capacity) < 1:
+        print("error: repeat, passengers, floors and capacity must be positive "
+              "and tolerance not negative", file=sys.stderr)
+        return 1
+
+    try:
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as fp:
+                baseline = json.load(fp)
+
+        results = []
+        print("{:<10s}{:>11s}{:>8s}{:>10s}{:>12s}{:>14s}{:>12s}".format(\
+              "strategy", "passengers", "floors", "capacity", "wall t", \
+              "passengers/s", "peak MB"))
+        for case in cases(args.strategy, args.passengers, args.floors, \
+                          args.capacity):
+            result = run_case(case, args.seed, args.repeat, not args.no_memory)
+            results.append(result)
+            print("{:<10s}{:>11d}{:>8d}{:>10d}{:>12.4f}{:>14d}{:>12}".format(\
+                  result["strategy"], result["passengers"], result["floors"], \
+                  result["capacity"], result["wall_time"], \
+                  result["passengers_per_second"], str(result["peak_memory_mb"])))
+
+        with open(args.out, "w") as fp:
+            json.dump({"python": platform.python_version(), \
+                       "numpy": numpy.__version__, \
+                       "machine": platform.platform(), \
+                       "seed": args.seed, "repeat": args.repeat, \
+                       "cases": results}, fp, indent=1)
+    except (OSError, ValueError) as error:
+        print("error:", error, file=sys.stderr)
+        return 1
+
+    print()
+    print(" {} cases written to {}".format(len(results), args.out))
+    if baseline is None:
+        return 0
+
+    regressions = 0
+    print()
+    print("{:<10s}{:>11s}{:>8s}{:>10s}{:>12s}{:>12s}{:>9s}".format(\
+          "strategy", "passengers", "floors", "capacity", "baseline t", \
+          "wall t", "ratio"))
+    for result, old_time, regressed in compare(results, baseline, args.tolerance):
+        if old_time is None:
+            continue
+        regressions += regressed
+        print("{:<10s}{:>11d}{:>8d}{:>10d}{:>12.4f}{:>12.4f}{:>9.2f}{}".format(\
+              result["strategy"], result["passengers"], result["floors"], \
+              result["capacity"], old_time, result["wall_time"], \
+              result["wall_time"] / old_time, "  REGRESSION" if regressed else ""))
+    print()
+    print(" {} regression(s) beyond {:.0%}".format(regressions, args.tolerance))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
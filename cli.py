@@ -0,0 +1,258 @@
+
+import argparse
+import json
+import sys
+
+import bank
+import batch
+import engine
+import profiling
+import report
+import runner
+import tracing
+import workload
+
+
+DEFAULTS = {
+    "rounds": 1,
+    "capacity": 10,
+    "strategies": ["strategy", "optimal"],
+    "workers": 1,
+    "cars": 1,
+    "dispatcher": "eta",
+    "stats": "multiple_run.txt",
+    "trace": "single_run",
+    "trace_level": "summary",
+    "checkpoint": None,
+    "checkpoint_every": 100,
+    "resume": False,
+    "report": None,
+    "replay": None,
+    "profile": None,
+    "lobby_bias": 1,
+    "instrument": None,
+    "batch": 1,
+    "sequential": False,
+    "precision": None,
+    "look": 100,
+}
+
+
+def parse_args(argv):
+    ''' Read the command line and the optional config file. Options given on
+    the command line win over the config file, which wins over DEFAULTS '''
+
+    parser = argparse.ArgumentParser(description="Run elevator simulations "
+                                     "without prompts or plot windows.")
+    parser.add_argument("--config", help="JSON file with any of the options "
+                        "below, e.g. {\"seed\": 1, \"rounds\": 100}")
+    parser.add_argument("--seed", type=int, help="seed for the whole run")
+    parser.add_argument("--rounds", type=int, help="number of rounds to "
+                        "simulate (default 1)")
+    parser.add_argument("--capacity", type=int, help="elevator capacity "
+                        "(default 10)")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(engine.STRATEGIES),
+                        help="elevators to compare (default strategy optimal)")
+    parser.add_argument("--workers", type=int, help="worker processes "
+                        "(default 1)")
+    parser.add_argument("--cars", type=int, help="cars per elevator bank "
+                        "(default 1)")
+    parser.add_argument("--dispatcher", choices=sorted(bank.DISPATCHERS),
+                        help="how a bank assigns hall calls (default eta)")
+    parser.add_argument("--stats", help="statistics report file "
+                        "(default multiple_run.txt)")
+    parser.add_argument("--trace", help="prefix of the trace record files "
+                        "(default single_run)")
+    parser.add_argument("--trace-level", choices=sorted(tracing.LEVELS),
+                        help="trace detail (default summary)")
+    parser.add_argument("--checkpoint", help="file to save progress to, "
+                        "removed when the run completes")
+    parser.add_argument("--checkpoint-every", type=int, help="rounds between "
+                        "checkpoints (default 100)")
+    parser.add_argument("--resume", action="store_true", default=None,
+                        help="continue the run saved in --checkpoint")
+    parser.add_argument("--replay", help="traffic log to replay instead of "
+                        "random passengers (.csv or binary, see replay.py)")
+    parser.add_argument("--profile", choices=sorted(workload.PROFILES),
+                        help="simulate a day of traffic following this "
+                        "daily profile instead of random passengers")
+    parser.add_argument("--lobby-bias", type=float, help="scale the "
+                        "profile's traffic to and from the lobby (default 1)")
+    parser.add_argument("--instrument", help="time the load, move and unload "
+                        "phases, print a table and write it as JSON to this "
+                        "file (default off)")
+    parser.add_argument("--batch", type=int, help="rounds to run in lockstep "
+                        "with the batched NumPy engine, see batch.py "
+                        "(default 1: one round at a time)")
+    parser.add_argument("--sequential", action="store_true", default=None,
+                        help="stop once the average wait difference from the "
+                        "first elevator is clear; --rounds is then the most "
+                        "to run")
+    parser.add_argument("--precision", type=float, help="with --sequential, "
+                        "also stop once that difference is known to +/- this "
+                        "many seconds")
+    parser.add_argument("--look", type=int, help="with --sequential, rounds "
+                        "between checks (default 100)")
+    parser.add_argument("--report", help="image file for the comparison "
+                        "charts, e.g. comparison.png (default none)")
+    args = parser.parse_args(argv)
+
+    options = dict(DEFAULTS)
+    if args.config:
+        with open(args.config) as fp:
+            config = json.load(fp)
+        unknown = set(config) - set(DEFAULTS) - {"seed"}
+        if unknown:
+            raise ValueError("unknown option(s) in {}: {}".format(\
+                             args.config, ", ".join(sorted(unknown))))
+        actions = {action.dest: action for action in parser._actions}
+        for key, value in config.items():
+            options[key] = config_value(actions[key], value, args.config)
+    for key, value in vars(args).items():
+        if value is not None and key != "config":
+            options[key] = value
+
+    if options.get("seed") is None:
+        raise ValueError("a seed is required (--seed or \"seed\" in --config)")
+    if options["rounds"] < 1 or options["capacity"] < 1 or \
+       options["workers"] < 1 or options["cars"] < 1 or \
+       options["checkpoint_every"] < 1 or options["batch"] < 1 or \
+       options["look"] < 1:
+        raise ValueError("rounds, capacity, workers, cars, checkpoint_every, "
+                         "batch and look must be positive")
+    if options["sequential"] and len(options["strategies"]) < 2:
+        raise ValueError("--sequential needs at least two strategies to compare")
+    if options["precision"] is not None and options["precision"] <= 0:
+        raise ValueError("precision must be positive")
+    if options["resume"] and not options["checkpoint"]:
+        raise ValueError("--resume needs a --checkpoint file")
+    for name in options["strategies"]:
+        if name not in engine.STRATEGIES:
+            raise ValueError("unknown strategy: {}".format(name))
+    if options["replay"] and options["profile"]:
+        raise ValueError("--replay and --profile cannot be combined")
+    if options["profile"] and options["profile"] not in workload.PROFILES:
+        raise ValueError("unknown profile: {}".format(options["profile"]))
+    if options["lobby_bias"] < 0:
+        raise ValueError("lobby_bias cannot be negative")
+    if options["batch"] > 1 and (options["cars"] > 1 or options["instrument"] or \
+                                 options["trace_level"] == "moves"):
+        raise ValueError("--batch runs single cars, without --instrument or "
+                         "move traces")
+    if options["batch"] > 1:
+        for name in options["strategies"]:
+            if name not in batch.STRATEGIES:
+                raise ValueError("the {} elevator cannot run with --batch".format(name))
+    if options["dispatcher"] not in bank.DISPATCHERS:
+        raise ValueError("unknown dispatcher: {}".format(options["dispatcher"]))
+    if options["trace_level"] not in tracing.LEVELS:
+        raise ValueError("unknown trace level: {}".format(options["trace_level"]))
+    return options
+
+
+def config_value(action, value, path):
+    ''' A config file value converted and checked like the argparse
+    action of its command-line option; raises ValueError '''
+
+    def convert(item):
+        if action.const is True:            #a store_true flag
+            if not isinstance(item, bool):
+                raise TypeError
+            return item
+        if isinstance(item, (bool, list, dict)) or \
+           action.type is int and isinstance(item, float) and not item.is_integer():
+            raise TypeError
+        item = (action.type or str)(item)
+        if action.choices is not None and item not in action.choices:
+            raise ValueError
+        return item
+
+    try:
+        if value is None:
+            if DEFAULTS.get(action.dest) is not None:
+                raise TypeError
+            return None
+        if action.nargs == "+":
+            if not isinstance(value, list) or not value:
+                raise TypeError
+            return [convert(item) for item in value]
+        return convert(value)
+    except (TypeError, ValueError):
+        raise ValueError("{}: bad value for {}: {}".format(path, action.dest, \
+                         json.dumps(value))) from None
+
+
+def run(options):
+    ''' Run the rounds, write the trace records and the statistics report
+    and return the per-elevator statistics '''
+
+    trace_level = tracing.LEVELS[options["trace_level"]]
+    tracer = tracing.Tracer(trace_level, options["trace"])
+    profiler = None
+    if options["instrument"]:
+        profiler = profiling.Profiler()
+        profiler.wrap(tracer, "flush", profiling.OUTPUT)
+    try:
+        round_function = runner.compare_batch if options["batch"] > 1 \
+                         else runner.compare_round
+        summary = runner.run_comparison(round_function, \
+            options["rounds"], (options["seed"], options["capacity"], \
+            options["strategies"], trace_level, options["cars"], \
+            options["dispatcher"], options["replay"], options["profile"], \
+            options["lobby_bias"], profiler is not None), options["workers"], \
+            tracer, options["checkpoint"], options["checkpoint_every"], \
+            options["resume"], profiler, options["batch"], \
+            options["sequential"], options["precision"], options["look"])
+    finally:
+        tracer.close()
+    if options["sequential"]:
+        print(" {} of at most {} rounds used".format(summary.rounds, \
+                                                     options["rounds"]))
+
+    stats = summary.stats()
+    if profiler is None:
+        write_outputs(options, stats)
+    else:
+        with profiler.phase(profiling.OUTPUT):
+            write_outputs(options, stats)
+        profiler.write_table()
+        profiler.dump(options["instrument"])
+    return stats
+
+
+def write_outputs(options, stats):
+    ''' Write the statistics report and the optional charts '''
+
+    with open(options["stats"], "w") as fp:
+        runner.write_statistics(fp, options["strategies"], stats)
+    if options["report"]:
+        report.plot_report(options["report"], \
+            ["{} Elevator".format(name.capitalize()) for name in options["strategies"]], \
+            stats)
+
+
+def main(argv=None):
+    ''' Command-line entry point; returns the process exit code '''
+
+    options = {}
+    try:
+        options = parse_args(argv)
+        stats = run(options)
+    except (OSError, ValueError) as error:
+        print("error:", error, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        if options.get("checkpoint"):
+            print("interrupted, continue with --resume --checkpoint {}".format(\
+                  options["checkpoint"]), file=sys.stderr)
+        return 130
+
+    rounds = sum(elevator["wins"] for elevator in stats)   #one winner a round
+    for name, elevator in zip(options["strategies"], stats):
+        print(" {} Elevator Wins: {} ({:.3f} %)".format(name.capitalize(), \
+              elevator["wins"], elevator["wins"] / rounds * 100))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,574 @@
+
+import heapq
+import math
+import random
+from collections import defaultdict, deque
+
+from passengers import PassengerTable
+from stats import RunningStats
+
+
+# Car event kinds. At equal times the heap pops lower kinds first.
+DOOR_OPEN = 0  # car opens its doors at the current floor
+LOAD = 1       # waiting passengers board the car
+DEPART = 2     # car picks its next floor and leaves
+ARRIVE = 3     # car reaches a floor (its target, or one it passes through)
+
+
+class EventQueue:
+    '''Min-heap of (time, kind, seq, data) events. seq keeps equal-time
+    events of the same kind in the order they were scheduled.'''
+
+    def __init__(self):
+        self.heap = []
+        self.seq = 0
+
+    def push(self, time, kind, data=None):
+        heapq.heappush(self.heap, (time, kind, self.seq, data))
+        self.seq += 1
+
+    def pop(self):
+        time, kind, seq, data = heapq.heappop(self.heap)
+        return time, kind, data
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class Simulation:
+    '''Single elevator car driven by discrete events.
+
+    Passengers come as a passengers.PassengerTable (or a list of
+    (arrival_time, source_floor, destination_floor) tuples) sorted by
+    arrival time and are referred to by row index. An arrival cursor
+    releases them into FIFO halls before each car event, and each car
+    cycle is DOOR_OPEN -> LOAD -> DEPART -> ARRIVE. Floors with car calls
+    or people waiting are kept as bitsets. Where the car goes next is up
+    to strategy (a Strategy); an optional tracing.Tracer gets the moves
+    and runs.
+    '''
+
+    def __init__(self, passenger_list, capacity, elevator_speed, loading_rate, \
+                 tracer=None, strategy=None):
+        if strategy is None:
+            raise TypeError("a Simulation needs a strategy")
+        self.strategy = strategy
+        self.name = self.strategy.name
+        self.collective = self.strategy.collective
+        self.directional = self.strategy.directional
+        self.passengers = self.strategy.prepare(\
+            PassengerTable.from_tuples(passenger_list))
+        #memoryviews read the table's columns as plain Python numbers
+        self.arrival = memoryview(self.passengers.arrival)
+        self.source = memoryview(self.passengers.source)
+        self.destination = memoryview(self.passengers.destination)
+        self.board_time = memoryview(self.passengers.board_time)
+        self.alight_time = memoryview(self.passengers.alight_time)
+        self.capacity = capacity
+        self.elevator_speed = elevator_speed
+        self.loading_rate = loading_rate
+        self.tracer = tracer
+        self.trace_moves = tracer is not None and tracer.moves
+        self.cycle = None            #trace record of the current move
+        self.picked_up = 0           #boarded while passing other floors
+
+        self.next_arrival = 0        #arrival cursor: next passenger to arrive
+        self.halls = defaultdict(deque)   #floor -> waiting passengers, FIFO
+        self.waiting_floors = 0      #bitset of the floors in halls
+        self.waiting_count = 0
+        self.onboard = {}            #destination floor -> passengers in the car
+        self.onboard_count = 0
+        self.car_calls = 0           #bitset of the floors in onboard
+        self.direction = 0           #1 up, -1 down, 0 either (directional)
+        self.up_calls = 0            #bitsets of floors with someone waiting
+        self.down_calls = 0          #to go up / down (directional only)
+        self.waiting_up = {}         #floor -> how many (directional only)
+        self.waiting_down = {}
+        self.unboarded = len(self.passengers)  #passengers still on file
+        self.wait_stats = RunningStats()
+
+        self.current_time = 0
+        self.current_floor = 0
+        self.elevator_moves = 0
+        self.time_b4_loading = 0
+        self.done = False
+        self.events = EventQueue()
+
+    def run(self):
+        ''' Run the simulation and return the total time, the number of
+        elevator moves and the wait time statistics (a RunningStats) '''
+
+        handlers = {DOOR_OPEN: self.on_door_open, LOAD: self.on_load, \
+                    DEPART: self.on_depart, ARRIVE: self.on_arrive}
+
+        self.passengers.clear_times()
+        if not self.finished():
+            self.events.push(0, DOOR_OPEN)
+        else:
+            self.done = True
+
+        while not self.done:
+            time, kind, data = self.events.pop()
+            self.release_arrivals(time)
+            handlers[kind](time, data)
+
+        if self.tracer is not None and self.tracer.summary:
+            self.tracer.add_summary((self.tracer.run, self.name, \
+                                     self.current_time, self.elevator_moves, \
+                                     self.wait_stats.mean, self.wait_stats.count))
+
+        return self.current_time, self.elevator_moves, self.wait_stats
+
+    def release_arrivals(self, time):
+        '''Move the arrival cursor past everyone who has arrived by time,
+        queueing them in the hall of their source floor, and return how
+        many arrived'''
+
+        index = self.next_arrival
+        end = len(self.arrival)
+        while index < end and self.arrival[index] <= time:
+            floor = self.source[index]
+            self.halls[floor].append(index)
+            self.waiting_floors |= 1 << floor
+            index += 1
+        if self.directional:
+            for call in range(self.next_arrival, index):
+                self.add_call(call)
+        released = index - self.next_arrival
+        self.waiting_count += released
+        self.next_arrival = index
+        return released
+
+    def add_call(self, index):
+        '''Record the hall call of passenger index, just queued, in the up
+        or down bitset of a directional car'''
+
+        floor = self.source[index]
+        if self.destination[index] > floor:
+            self.waiting_up[floor] = self.waiting_up.get(floor, 0) + 1
+            self.up_calls |= 1 << floor
+        else:
+            self.waiting_down[floor] = self.waiting_down.get(floor, 0) + 1
+            self.down_calls |= 1 << floor
+
+    def finished(self):
+        return self.strategy.finished(self)
+
+    ############################## EVENT HANDLERS ##############################
+
+    def on_door_open(self, time, data):
+        self.current_time = time
+        self.time_b4_loading = time
+        self.events.push(time, LOAD)
+
+    def on_load(self, time, data):
+        if self.directional:
+            self.direction = self.strategy.heading(self)
+        c_pas = self.board(self.current_floor, time, self.direction)
+        time_taken = c_pas * self.loading_rate
+        if self.trace_moves:
+            self.cycle = (self.current_floor, time, time_taken, \
+                          self.onboard_count, time + time_taken)
+            self.picked_up = 0
+        self.events.push(time + time_taken, DEPART)
+
+    def on_depart(self, time, woke):
+        self.current_time = time
+        target = self.next_stop(woke)
+
+        if target is None:
+            #nobody to serve yet, sleep until the next passenger has arrived
+            arrival_time = self.arrival[self.next_arrival]
+            idle = max(1, math.ceil(arrival_time - time))
+            self.events.push(time + idle, DEPART, True)
+
+        elif self.collective and target != self.current_floor:
+            floor, arrive_time = self.pass_through(self.current_floor, target, time)
+            self.events.push(arrive_time, ARRIVE, \
+                             (floor, target, self.current_floor))
+        else:
+            move_time = abs(target - self.current_floor) * self.elevator_speed
+            self.events.push(time + move_time, ARRIVE, \
+                             (target, target, self.current_floor))
+
+    def on_arrive(self, time, data):
+        floor, target, origin = data
+        self.current_time = time
+        self.current_floor = floor
+
+        if self.collective and floor != origin:
+            #pick up anyone waiting here on the way, doors open only briefly
+            self.picked_up += self.board(floor, time)
+
+        if floor != target:
+            floor, time = self.pass_through(floor, target, time)
+            self.events.push(time, ARRIVE, (floor, target, origin))
+            return
+
+        self.elevator_moves += 1
+        c_unload, unload_time = self.unload(time)
+
+        if self.trace_moves:
+            move_time = abs(target - origin) * self.elevator_speed
+            self.tracer.add_move((self.tracer.run, self.name) + self.cycle + \
+                                 (origin, target, move_time, time, \
+                                  self.picked_up, c_unload, unload_time, \
+                                  self.current_time))
+
+        if self.finished():
+            self.done = True
+        else:
+            self.events.push(self.current_time, DOOR_OPEN)
+
+    ############################### CAR ACTIONS ################################
+
+    def board(self, floor, time, direction=0):
+        '''Board passengers waiting at floor up to capacity at time, only
+        those going direction (1 up, -1 down) unless it is 0, and return
+        how many got on'''
+
+        hall = self.halls.get(floor)
+        if not hall:
+            return 0
+
+        room = self.capacity - self.onboard_count
+        if direction:
+            boarding = self.take_going(hall, floor, direction, room)
+        else:
+            boarding = [hall.popleft() for i in range(min(room, len(hall)))]
+        for index in boarding:
+            self.board_time[index] = time
+            dst_floor = self.destination[index]
+            if dst_floor in self.onboard:
+                self.onboard[dst_floor].append(index)
+            else:
+                self.onboard[dst_floor] = [index]
+                self.car_calls |= 1 << dst_floor
+        c_pas = len(boarding) #count of passengers loading
+        self.onboard_count += c_pas
+        if not hall:
+            del self.halls[floor]
+            self.waiting_floors &= ~(1 << floor)
+
+        self.waiting_count -= c_pas
+        self.unboarded -= c_pas
+        return c_pas
+
+    def take_going(self, hall, floor, direction, room):
+        '''Take up to room passengers going direction out of hall, first
+        come first served, leaving everyone else queued in order'''
+
+        up = direction > 0
+        counts = self.waiting_up if up else self.waiting_down
+        wanted = min(room, counts.get(floor, 0))
+        if not wanted:
+            return []
+        taken, skipped = [], []
+        while len(taken) < wanted:
+            index = hall.popleft()
+            if (self.destination[index] > floor) == up:
+                taken.append(index)
+            else:
+                skipped.append(index)
+        hall.extendleft(reversed(skipped))
+
+        counts[floor] -= wanted
+        if not counts[floor]:
+            del counts[floor]
+            if up:
+                self.up_calls &= ~(1 << floor)
+            else:
+                self.down_calls &= ~(1 << floor)
+        return taken
+
+    def unload(self, time):
+        '''Unload passengers whose destination is the current floor and
+        return how many got off and the time it took'''
+
+        exit_list = self.onboard.pop(self.current_floor, [])
+        self.onboard_count -= len(exit_list)
+        if exit_list:
+            self.car_calls &= ~(1 << self.current_floor)
+
+        time_taken = len(exit_list) * self.loading_rate #time to unload
+        self.current_time = time + time_taken
+
+        for index in exit_list:
+            self.alight_time[index] = self.current_time
+            wait_time = round((self.current_time - self.source[index]), 4)
+            self.wait_stats.add(wait_time)
+
+        return len(exit_list), time_taken
+
+    def pass_through(self, floor, target, time):
+        '''Floor where the collective car, leaving floor at time for
+        target, next needs an event, and when it gets there: target, the
+        first floor on the way with someone waiting while there is room, or
+        the first floor reached at or after pass_deadline(). The floor comes
+        from one bit operation on waiting_floors and the time from the
+        distance, without stepping through the floors in between.'''
+
+        step = 1 if target > floor else -1
+        stop = target
+        if self.onboard_count < self.capacity:
+            ahead = _beyond(self.waiting_floors, floor, step)
+            if ahead and (target - _nearest(ahead, step)) * step > 0:
+                stop = _nearest(ahead, step)
+        distance = abs(stop - floor)
+        speed = self.elevator_speed
+        deadline = self.pass_deadline()
+        if deadline < math.inf and time + distance * speed >= deadline:
+            #stop at the first floor reached at or after the deadline
+            floors = 1
+            if speed > 0 and deadline > time + speed:
+                floors = math.ceil((deadline - time) / speed)
+                if time + floors * speed < deadline:
+                    floors += 1
+            distance = min(distance, floors)
+        return floor + step * distance, time + distance * speed
+
+    def pass_deadline(self):
+        '''Time from which a collective car stops at every floor it passes:
+        when the next passenger arrives, while there is room for them'''
+
+        if self.next_arrival < len(self.arrival) and \
+                self.onboard_count < self.capacity:
+            return self.arrival[self.next_arrival]
+        return math.inf
+
+    ############################# DISPATCH QUERIES #############################
+
+    def next_stop(self, woke):
+        return self.strategy.next_stop(self, woke)
+
+    def waiting_here(self):
+        return self.current_floor in self.halls
+
+    def floor_with_most_waiting(self):
+        '''Floor with the most people waiting; ties go to the closest floor,
+        then to the floor whose first passenger arrived earliest'''
+
+        best = None
+        for floor, hall in self.halls.items():
+            key = -len(hall), abs(floor - self.current_floor), hall[0]
+            if best is None or key < best[0]:
+                best = key, floor
+        return best[1]
+
+    def closest_waiting_floor(self):
+        '''Closest source floor of anyone waiting, earliest arrival first'''
+
+        best = None
+        for floor, hall in self.halls.items():
+            key = abs(floor - self.current_floor), hall[0]
+            if best is None or key < best[0]:
+                best = key, floor
+        return best[1]
+
+    def closest_destinations(self):
+        '''Destination floors onboard closest to the car, with how many
+        passengers are going to each'''
+
+        distance = min(abs(floor - self.current_floor) for floor in self.onboard)
+        floors = [self.current_floor - distance]
+        if distance:
+            floors.append(self.current_floor + distance)
+        return [(floor, len(self.onboard[floor])) for floor in floors \
+                if floor in self.onboard]
+
+    def random_floor(self, floor_counts):
+        '''Floor of a passenger picked uniformly at random from
+        (floor, count) pairs'''
+
+        floor_counts = list(floor_counts)
+        pick = random.randrange(sum(count for floor, count in floor_counts))
+        for floor, count in floor_counts:
+            if pick < count:
+                return floor
+            pick -= count
+
+
+def _beyond(floors, floor, direction):
+    '''The floors of bitset floors past floor in direction (1 up, -1 down)'''
+
+    if direction > 0:
+        return floors >> (floor + 1) << (floor + 1)
+    return floors & ((1 << floor) - 1)
+
+
+def _nearest(floors, direction):
+    '''The first floor of a non-empty bitset met going in direction'''
+
+    if direction > 0:
+        return (floors & -floors).bit_length() - 1
+    return floors.bit_length() - 1
+
+
+class Strategy:
+    '''Dispatch strategy: where a car goes next.
+
+    Simulation asks next_stop(car, woke) every time the car is ready to
+    leave. The strategy reads the car and hall state through car (halls,
+    onboard, current_floor, the counts and the dispatch queries) and
+    returns the floor to move to, or None to wait for the next arrival;
+    woke is True when the car has just been idle. A collective strategy
+    has the car board waiting passengers at every floor it passes.
+    prepare() may drop passengers the strategy ignores, and finished()
+    says when a run is over. A directional strategy gives the car a
+    heading(car) before every load, and only passengers going that way
+    board.
+    '''
+
+    name = ""
+    collective = False
+    directional = False
+
+    def prepare(self, passengers):
+        return passengers
+
+    def finished(self, car):
+        '''True once nobody is left on file and the car is empty'''
+        return car.unboarded == 0 and car.onboard_count == 0
+
+    def next_stop(self, car, woke):
+        raise NotImplementedError
+
+
+class RandomStrategy(Strategy):
+    '''Random elevator: goes wherever a randomly picked passenger wants'''
+
+    name = "random"
+
+    def finished(self, car):
+        #the random elevator stops as soon as everyone has boarded
+        return car.unboarded == 0
+
+    def next_stop(self, car, woke):
+        if woke:
+            if car.waiting_here():
+                return car.current_floor
+            return car.random_floor((floor, len(hall)) for floor, hall \
+                                    in car.halls.items())
+
+        if car.onboard_count != 0:
+            return car.random_floor((floor, len(bucket)) for floor, bucket \
+                                    in car.onboard.items())
+        if car.waiting_count != 0:
+            return car.random_floor((floor, len(hall)) for floor, hall \
+                                    in car.halls.items())
+        return None
+
+
+class NearestStrategy(Strategy):
+    '''Strategy elevator: nearest destination onboard, otherwise the floor
+    with the most people waiting'''
+
+    name = "strategy"
+
+    def next_stop(self, car, woke):
+        if woke:
+            if car.waiting_here():
+                return car.current_floor
+            return car.closest_waiting_floor()
+
+        if car.onboard_count != 0:
+            closest = car.closest_destinations()
+            if len(closest) == 1 and closest[0][1] == 1:
+                return closest[0][0]
+            return car.random_floor(closest) #there's more than one
+        if car.waiting_count != 0:
+            return car.floor_with_most_waiting()
+        return None
+
+
+class OptimalStrategy(NearestStrategy):
+    '''Optimal elevator: like the strategy elevator, but breaks ties
+    towards the direction most passengers are heading and picks people up
+    at every floor it passes'''
+
+    name = "optimal"
+    collective = True
+
+    def prepare(self, passengers):
+        #people going to the floor they are already on are ignored
+        stay = passengers.source == passengers.destination
+        if stay.any():
+            passengers = passengers.select(~stay)
+        return passengers
+
+    def next_stop(self, car, woke):
+        if woke or car.onboard_count == 0:
+            return super().next_stop(car, woke)
+
+        closest = car.closest_destinations()
+        if len(closest) == 1:
+            return closest[0][0]
+
+        #the same distance above and below: go where most people are going
+        (down_floor, down_close), (up_floor, up_close) = closest
+        up = sum(len(bucket) for floor, bucket in car.onboard.items() \
+                 if floor > car.current_floor)
+        down = car.onboard_count - up
+
+        if up_close > down_close:
+            return up_floor
+        if up_close < down_close:
+            return down_floor
+        if up > down:
+            return up_floor
+        if up < down:
+            return down_floor
+        return car.random_floor(closest)
+
+
+class LookStrategy(OptimalStrategy):
+    '''Optimal elevator under collective control (LOOK): the car keeps
+    going one way while there is anything left to do that way, then
+    turns. On the way it only stops where someone gets off or, while there
+    is room, someone waits to go its way, and it turns at the farthest call
+    for the other way. Stops are read off the car's bitsets, so floors with
+    nothing to do are skipped outright instead of passed one at a time.'''
+
+    name = "look"
+    collective = False   #it picks up on the way by stopping, not in passing
+    directional = True
+
+    def heading(self, car):
+        '''Keep going while there is something to do ahead or someone here
+        going the same way, else turn; an idle car takes whoever waits
+        here longest where they are going'''
+
+        floor = car.current_floor
+        room = car.onboard_count < car.capacity
+        hall_calls = car.waiting_floors if room else 0
+        for way in (car.direction, -car.direction) if car.direction else ():
+            here = car.up_calls if way > 0 else car.down_calls
+            if _beyond(car.car_calls | hall_calls, floor, way) or \
+               room and here >> floor & 1:
+                return way
+        hall = car.halls.get(floor)
+        if hall:
+            return 1 if car.destination[hall[0]] > floor else -1
+        return 0
+
+    def next_stop(self, car, woke):
+        going = car.direction
+        if not going:
+            return car.closest_waiting_floor() if car.waiting_count else None
+
+        floor = car.current_floor
+        stops = car.car_calls
+        if car.onboard_count < car.capacity:
+            stops |= car.up_calls if going > 0 else car.down_calls
+        ahead = _beyond(stops, floor, going)
+        if ahead:
+            return _nearest(ahead, going)
+        #nothing more to do this way: turn at the farthest call going back
+        turns = _beyond(car.down_calls if going > 0 else car.up_calls, \
+                        floor, going)
+        return _nearest(turns, -going)
+
+
+# Strategies by name, for choosing elevators from the command line
+STRATEGIES = {"random": RandomStrategy, "strategy": NearestStrategy, \
+              "optimal": OptimalStrategy, "look": LookStrategy}
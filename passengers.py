@@ -0,0 +1,108 @@
+
+import numpy
+
+
+class PassengerTable:
+    '''Compact passenger store: one typed NumPy column per field instead of
+    one tuple per passenger.
+
+    Columns are id, arrival, source, destination, board_time and
+    alight_time. Passengers are sorted by arrival time and referred to by
+    their row index; id keeps the row a passenger had in the original
+    workload when a table is filtered. board_time and alight_time are NaN
+    until a simulation run fills them in, and hold the times of the last
+    run made on the table. id and the two time columns are only allocated
+    when first used, so a table over memory-mapped columns (a binary log,
+    see replay.py) costs no memory until a simulation runs on it.
+
+    Indexing a row still gives the old (arrival_time, source_floor,
+    destination_floor) tuple, so code written for passenger lists keeps
+    working, but whole-population questions should use the columns.
+    '''
+
+    def __init__(self, arrival, source, destination, ids=None):
+        self.arrival = numpy.ascontiguousarray(arrival, dtype=numpy.float64)
+        self.source = numpy.ascontiguousarray(source, dtype=numpy.int32)
+        self.destination = numpy.ascontiguousarray(destination, dtype=numpy.int32)
+        self._id = None if ids is None else \
+                   numpy.ascontiguousarray(ids, dtype=numpy.int64)
+        self._board_time = None
+        self._alight_time = None
+
+    @property
+    def id(self):
+        if self._id is None:
+            self._id = numpy.arange(len(self.arrival), dtype=numpy.int64)
+        return self._id
+
+    @property
+    def board_time(self):
+        if self._board_time is None:
+            self._board_time = numpy.full(len(self.arrival), numpy.nan)
+        return self._board_time
+
+    @property
+    def alight_time(self):
+        if self._alight_time is None:
+            self._alight_time = numpy.full(len(self.arrival), numpy.nan)
+        return self._alight_time
+
+    @classmethod
+    def from_tuples(cls, passenger_list):
+        '''Table of a list of (arrival_time, source_floor,
+        destination_floor) tuples'''
+
+        if isinstance(passenger_list, cls):
+            return passenger_list
+        if len(passenger_list) == 0:
+            return cls([], [], [])
+        arrival, source, destination = zip(*passenger_list)
+        return cls(arrival, source, destination)
+
+    def __len__(self):
+        return len(self.arrival)
+
+    def __getitem__(self, index):
+        return self.arrival[index].item(), self.source[index].item(), \
+               self.destination[index].item()
+
+    def __iter__(self):
+        return zip(self.arrival.tolist(), self.source.tolist(), \
+                   self.destination.tolist())
+
+    def select(self, mask):
+        '''New table of the passengers where mask (a boolean array) is
+        True, keeping their ids'''
+
+        ids = numpy.flatnonzero(mask) if self._id is None else self._id[mask]
+        return PassengerTable(self.arrival[mask], self.source[mask], \
+                              self.destination[mask], ids)
+
+    def copy(self):
+        table = PassengerTable(self.arrival.copy(), self.source.copy(), \
+                               self.destination.copy(), \
+                               None if self._id is None else self._id.copy())
+        if self._board_time is not None:
+            table._board_time = self._board_time.copy()
+        if self._alight_time is not None:
+            table._alight_time = self._alight_time.copy()
+        return table
+
+    def clear_times(self):
+        for column in (self._board_time, self._alight_time):
+            if column is not None:
+                column.fill(numpy.nan)
+
+    def wait_times(self):
+        '''Wait time of every delivered passenger, measured as the
+        simulations always have: alight time minus source floor'''
+
+        delivered = ~numpy.isnan(self.alight_time)
+        return numpy.round(self.alight_time[delivered] - self.source[delivered], 4)
+
+    @property
+    def nbytes(self):
+        '''Bytes of the columns allocated so far'''
+        return sum(column.nbytes for column in (self.arrival, self.source, \
+                   self.destination, self._id, self._board_time, \
+                   self._alight_time) if column is not None)
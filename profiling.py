@@ -0,0 +1,143 @@
+
+import contextlib
+import json
+import sys
+import time
+
+
+# Instrumented phases, in table order
+RELEASE = "release"  # arrivals queued in the halls (or dispatched, in a bank)
+LOAD = "load"        # waiting passengers boarding
+MOVE = "move"        # choosing the next floor
+UNLOAD = "unload"    # passengers getting off
+TRACE = "trace"      # building trace records
+RUN = "run"          # whole simulation runs, the phases above included
+OUTPUT = "output"    # writing trace files, statistics and charts
+
+PHASES = (RELEASE, LOAD, MOVE, UNLOAD, TRACE, RUN, OUTPUT)
+
+# Phases that happen inside RUN
+INNER = (RELEASE, LOAD, MOVE, UNLOAD, TRACE)
+
+
+class Profiler:
+    '''Per-phase call counts, wall time and passengers scanned.
+
+    instrument() wraps a simulation's hot methods with timed versions on
+    that one object, so simulations that are not instrumented run the
+    plain methods and a disabled profiler costs nothing. Profilers are
+    plain counters, so worker processes can each keep one and hand it back
+    to be merged.
+    '''
+
+    def __init__(self):
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.scanned = dict.fromkeys(PHASES, 0)
+
+    def wrap(self, obj, method, phase, count=None):
+        '''Replace obj.method with a version that adds to phase. count(obj,
+        result) gives the passengers the call scanned.'''
+
+        original = getattr(obj, method)
+        clock = time.perf_counter
+        calls, seconds, scanned = self.calls, self.seconds, self.scanned
+
+        def timed(*args):
+            start = clock()
+            result = original(*args)
+            seconds[phase] += clock() - start
+            calls[phase] += 1
+            if count is not None:
+                scanned[phase] += count(obj, result)
+            return result
+
+        setattr(obj, method, timed)
+
+    def instrument(self, simulation):
+        '''Instrument a engine.Simulation, or a bank.Bank and its cars'''
+
+        cars = getattr(simulation, "cars", None)
+        if cars is None:
+            cars = [simulation]
+            self.wrap(simulation, "release_arrivals", RELEASE, \
+                      lambda sim, released: released)
+        else:
+            self.wrap(simulation, "call", RELEASE, lambda bank, result: 1)
+        for car in cars:
+            self.wrap(car, "board", LOAD, lambda sim, boarded: boarded)
+            #strategies look at floors and bitsets, not at passengers
+            self.wrap(car, "next_stop", MOVE)
+            self.wrap(car, "unload", UNLOAD, lambda sim, result: result[0])
+        for tracer in {id(sim.tracer): sim.tracer for sim in [simulation] + cars \
+                       if sim.tracer is not None}.values():
+            if "add_move" not in vars(tracer):   #not already instrumented
+                self.wrap(tracer, "add_move", TRACE)
+                self.wrap(tracer, "add_summary", TRACE)
+        self.wrap(simulation, "run", RUN, \
+                  lambda sim, result: len(sim.passengers))
+
+    @contextlib.contextmanager
+    def phase(self, phase, scanned=0):
+        '''Time the body of a with statement as one call of phase'''
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[phase] += time.perf_counter() - start
+            self.calls[phase] += 1
+            self.scanned[phase] += scanned
+
+    def merge(self, other):
+        for phase in PHASES:
+            self.calls[phase] += other.calls[phase]
+            self.seconds[phase] += other.seconds[phase]
+            self.scanned[phase] += other.scanned[phase]
+        return self
+
+    def rows(self):
+        '''One dict per phase that was called, plus "other": the time runs
+        spent outside the inner phases (event loop and bookkeeping)'''
+
+        rows = []
+        for phase in PHASES:
+            if self.calls[phase]:
+                rows.append(self._row(phase, self.calls[phase], \
+                                      self.seconds[phase], self.scanned[phase]))
+            if phase == TRACE and self.calls[RUN]:
+                other = self.seconds[RUN] - sum(self.seconds[p] for p in INNER)
+                rows.append(self._row("other", 0, max(other, 0.0), 0))
+        return rows
+
+    def _row(self, phase, calls, seconds, scanned):
+        run = self.seconds[RUN]
+        return {"phase": phase, "calls": calls, "seconds": round(seconds, 6), \
+                "us_per_call": round(seconds / calls * 1e6, 3) if calls else None, \
+                "scanned": scanned, \
+                "scanned_per_call": round(scanned / calls, 3) if scanned else None, \
+                "share_of_run": round(seconds / run, 4) \
+                    if run and phase not in (RUN, OUTPUT) else None}
+
+    def write_table(self, fp=sys.stdout):
+        print(file=fp)
+        print("{:<10s}{:>12s}{:>12s}{:>12s}{:>14s}{:>10s}{:>9s}".format(\
+              "phase", "calls", "seconds", "us/call", "scanned", "/call", \
+              "of run"), file=fp)
+        for row in self.rows():
+            print("{:<10s}{:>12s}{:>12.4f}{:>12s}{:>14s}{:>10s}{:>9s}".format(\
+                  row["phase"], str(row["calls"] or ""), row["seconds"], \
+                  _blank(row["us_per_call"], "{:.2f}"), \
+                  str(row["scanned"] or ""), \
+                  _blank(row["scanned_per_call"], "{:.2f}"), \
+                  _blank(row["share_of_run"], "{:.1%}")), file=fp)
+
+    def dump(self, path):
+        '''Write the rows as JSON to path'''
+
+        with open(path, "w") as fp:
+            json.dump({"phases": self.rows()}, fp, indent=1)
+
+
+def _blank(value, form):
+    return "" if value is None else form.format(value)
@@ -0,0 +1,350 @@
+
+import argparse
+import asyncio
+import math
+import sys
+import threading
+import time
+
+import engine
+import replay
+import workload
+from stats import RunningStats
+
+
+REPLAY_CHUNK = 1 << 16   # rows of a replayed log read at a time
+
+
+class LiveCar(engine.Simulation):
+    '''One car driven in real time by a live feed of hall calls.
+
+    Runs the single-car driver with any engine.Strategy, but the passengers
+    are not known in advance: call() adds each one as their hall call comes
+    in, at the current simulated time, and the car's events run when the
+    wall clock reaches them, scale simulated seconds to the wall-clock
+    second. Every call and every event first runs whatever car events are
+    due, so the strategy decides on the halls as they are at that moment.
+    Like a car of a bank.Bank, a car with nothing to do parks until it is
+    given a call. A collective car cannot know who will call at the floors
+    ahead, so it stops at every floor it passes. After close() the car
+    serves whoever is left and then finishes.
+
+    The time the strategy takes for each next_stop decision and the time
+    each call takes to queue are kept, in microseconds, in RunningStats, as
+    is how late each car event ran on the wall clock.
+    '''
+
+    def __init__(self, capacity, elevator_speed, loading_rate, strategy, \
+                 scale=1.0, out=None):
+        super().__init__([], capacity, elevator_speed, loading_rate, None, \
+                         strategy)
+        #the passengers grow with every call, so the columns are plain lists
+        self.arrival, self.source, self.destination = [], [], []
+        self.board_time, self.alight_time = [], []
+        self.scale = scale
+        self.out = out               #file to report each departure to
+        self.start = None            #loop time at simulated time 0
+        self.closed = False          #no more calls are coming
+        self.idle_since = 0          #parked at floor 0 until the first call
+        self.wake = asyncio.Event()  #set when the next event may be sooner
+        self.handlers = {engine.DOOR_OPEN: self.on_door_open, \
+                         engine.LOAD: self.on_load, \
+                         engine.DEPART: self.on_depart, \
+                         engine.ARRIVE: self.on_arrive}
+
+        self.trip_stats = RunningStats()       #call to drop-off, seconds
+        self.decision_latency = RunningStats() #next_stop, microseconds
+        self.call_latency = RunningStats()     #call(), microseconds
+        self.lag = RunningStats()              #event lateness, microseconds
+
+    def now(self):
+        '''Simulated time now'''
+        return (asyncio.get_running_loop().time() - self.start) * self.scale
+
+    def call(self, source_floor, destination_floor):
+        '''Queue a hall call made now and wake the car if it is parked;
+        return the passenger's index'''
+
+        now = self.now()
+        self.advance(now)
+        started = time.perf_counter()
+        index = len(self.arrival)
+        self.arrival.append(now)
+        self.source.append(source_floor)
+        self.destination.append(destination_floor)
+        self.board_time.append(math.nan)
+        self.alight_time.append(math.nan)
+        self.next_arrival = index + 1
+
+        self.halls[source_floor].append(index)
+        self.waiting_floors |= 1 << source_floor
+        self.waiting_count += 1
+        self.unboarded += 1
+        if self.directional:
+            self.add_call(index)
+        if self.idle_since is not None:
+            self.events.push(max(now, self.current_time), engine.DEPART, True)
+            self.idle_since = None
+            self.wake.set()
+        self.call_latency.add((time.perf_counter() - started) * 1e6)
+        return index
+
+    def close(self):
+        '''No more calls: finish once everyone has been served'''
+        self.closed = True
+        self.wake.set()
+
+    def advance(self, until):
+        '''Run the car events due by simulated time until'''
+
+        heap = self.events.heap
+        while heap and heap[0][0] <= until and not self.done:
+            time, kind, data = self.events.pop()
+            self.lag.add((until - time) / self.scale * 1e6)
+            self.handlers[kind](time, data)
+
+    async def drive(self):
+        ''' Run the car's events on the wall clock until it has finished '''
+
+        loop = asyncio.get_running_loop()
+        if self.start is None:
+            self.start = loop.time()
+        while True:
+            self.advance(self.now())
+            if self.done or self.closed and self.idle_since is not None:
+                return
+            delay = None
+            if self.events.heap:
+                delay = self.start + self.events.heap[0][0] / self.scale - \
+                        loop.time()
+            self.wake.clear()
+            try:
+                await asyncio.wait_for(self.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    ############################## CAR OVERRIDES ###############################
+
+    def finished(self):
+        return self.closed and not self.halls and self.onboard_count == 0
+
+    def pass_deadline(self):
+        #the next call is not known in advance, so stop at every floor
+        return -math.inf
+
+    def on_depart(self, time, woke):
+        if not self.halls and self.onboard_count == 0:
+            #nothing to do, park until the next call
+            self.current_time = time
+            self.idle_since = time
+            return
+        super().on_depart(time, woke)
+
+    def next_stop(self, woke):
+        started = time.perf_counter()
+        target = super().next_stop(woke)
+        self.decision_latency.add((time.perf_counter() - started) * 1e6)
+        if target is not None and self.out is not None:
+            print("{:10.2f} s  floor {:>3d} -> {:>3d}  waiting {:>4d}  onboard {:>3d}".\
+                  format(self.current_time, self.current_floor, target, \
+                         self.waiting_count, self.onboard_count), file=self.out)
+        return target
+
+    def unload(self, time):
+        leaving = self.onboard.get(self.current_floor, ())
+        result = super().unload(time)
+        for index in leaving:
+            self.trip_stats.add(self.alight_time[index] - self.arrival[index])
+        return result
+
+
+def parse_call(line, floors):
+    '''(source floor, destination floor) of a feed line such as "3 7" or
+    "3,7", or None for a blank or # comment line; raises ValueError'''
+
+    line = line.split("#", 1)[0].strip()
+    if not line:
+        return None
+    fields = line.replace(",", " ").split()
+    if len(fields) != 2:
+        raise ValueError("expected a source and a destination floor")
+    try:
+        source_floor, destination_floor = int(fields[0]), int(fields[1])
+    except ValueError:
+        raise ValueError("floors must be whole numbers") from None
+    for floor in (source_floor, destination_floor):
+        if not 0 <= floor <= floors:
+            raise ValueError("floors are 0 to {}".format(floors))
+    if source_floor == destination_floor:
+        raise ValueError("source and destination are the same floor")
+    return source_floor, destination_floor
+
+
+def take_line(car, line, floors):
+    '''Queue the call on a feed line; return the reply to send back'''
+
+    try:
+        floors_called = parse_call(line, floors)
+    except ValueError as error:
+        return "error: {}\n".format(error)
+    if floors_called is None:
+        return ""
+    return "ok {}\n".format(car.call(*floors_called))
+
+
+############################### HALL-CALL FEEDS ################################
+
+async def stdin_feed(car, floors):
+    ''' Calls from standard input, one per line, until end of file '''
+
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def answer(line):
+        reply = take_line(car, line, floors)
+        if reply.startswith("error"):
+            print(reply, end="", file=sys.stderr)
+
+    def read():
+        #a daemon thread, so a blocked read never holds up Ctrl-C
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(answer, line)
+        loop.call_soon_threadsafe(done.set_result, None)
+
+    threading.Thread(target=read, daemon=True).start()
+    await done
+    car.close()
+
+
+async def socket_feed(car, floors, port):
+    ''' Calls from any number of TCP clients on localhost port, one per
+    line, each answered with "ok <passenger>" or "error: ..."; runs until
+    interrupted '''
+
+    async def client(reader, writer):
+        async for line in reader:
+            writer.write(take_line(car, line.decode(errors="replace"), \
+                                   floors).encode())
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(client, "127.0.0.1", port)
+    print("Listening for hall calls on 127.0.0.1:{}".format(port), file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def replay_feed(car, path):
+    ''' Calls of a traffic log (see replay.py), each made when the scaled
+    wall clock reaches its arrival time '''
+
+    loop = asyncio.get_running_loop()
+    table = replay.load(path)
+    #a chunk of rows at a time, so a memory-mapped log stays on disk
+    for start in range(0, len(table), REPLAY_CHUNK):
+        rows = slice(start, start + REPLAY_CHUNK)
+        for arrival, source_floor, destination_floor in \
+                zip(table.arrival[rows].tolist(), table.source[rows].tolist(), \
+                    table.destination[rows].tolist()):
+            if source_floor == destination_floor:
+                continue
+            delay = car.start + arrival / car.scale - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            car.call(source_floor, destination_floor)
+    car.close()
+
+
+async def run_live(car, feed):
+    ''' Drive car while feed (a coroutine taking the car) makes its calls '''
+
+    car.start = asyncio.get_running_loop().time()
+    feeding = asyncio.ensure_future(feed)
+    driving = asyncio.ensure_future(car.drive())
+    await asyncio.wait([feeding, driving], return_when=asyncio.FIRST_EXCEPTION)
+    for task in (feeding, driving):
+        if task.done():
+            task.result()    #raise whatever went wrong
+    await driving
+
+
+def write_summary(car, fp=sys.stdout):
+    ''' Report the calls served and the latency of the car's decisions '''
+
+    print(file=fp)
+    print(" Calls: {}   Delivered: {}   Moves: {}   Simulated time: {:.2f} s".\
+          format(len(car.arrival), car.trip_stats.count, car.elevator_moves, \
+                 car.current_time), file=fp)
+    if car.trip_stats.count:
+        print(" Call to drop-off: mean {:.2f} s, p95 {:.2f} s, max {:.2f} s".\
+              format(car.trip_stats.mean, car.trip_stats.quantile(0.95), \
+                     car.trip_stats.max), file=fp)
+    for label, latency in (("Dispatch decisions", car.decision_latency), \
+                           ("Hall calls queued", car.call_latency), \
+                           ("Car events run late", car.lag)):
+        if latency.count:
+            print(" {}: {}, mean {:.1f} us, p50 {:.1f} us, p99 {:.1f} us, "
+                  "max {:.1f} us".format(label, latency.count, latency.mean, \
+                  latency.quantile(0.5), latency.quantile(0.99), latency.max), \
+                  file=fp)
+
+
+def main(argv=None):
+    ''' Command-line entry point; returns the process exit code '''
+
+    parser = argparse.ArgumentParser(description="Run an elevator in real "
+                                     "time on hall calls from standard input, "
+                                     "a local socket or a traffic log.")
+    parser.add_argument("--strategy", choices=sorted(engine.STRATEGIES), \
+                        default="optimal")
+    parser.add_argument("--capacity", type=int, default=10)
+    parser.add_argument("--speed", type=float, default=1.0, \
+                        help="seconds per floor (default 1)")
+    parser.add_argument("--loading-rate", type=float, default=0.3, \
+                        help="seconds per passenger to load or unload "
+                        "(default 0.3)")
+    parser.add_argument("--floors", type=int, default=workload.FLOORS, \
+                        help="top floor, floors are 0 to this (default {})".\
+                        format(workload.FLOORS))
+    parser.add_argument("--scale", type=float, default=1.0, \
+                        help="simulated seconds per wall-clock second "
+                        "(default 1)")
+    parser.add_argument("--port", type=int, help="take calls from TCP "
+                        "clients on this localhost port instead of stdin")
+    parser.add_argument("--replay", help="make the calls of this traffic log "
+                        "(.csv or binary, see replay.py) instead")
+    parser.add_argument("--quiet", action="store_true", \
+                        help="do not print each departure")
+    args = parser.parse_args(argv)
+    if args.capacity < 1 or args.speed < 0 or args.loading_rate < 0 or \
+       args.floors < 1 or args.scale <= 0:
+        print("error: capacity, floors and scale must be positive, speed and "
+              "loading rate not negative", file=sys.stderr)
+        return 1
+    if args.port is not None and args.replay:
+        print("error: --port and --replay are different feeds, pick one", \
+              file=sys.stderr)
+        return 1
+
+    car = LiveCar(args.capacity, args.speed, args.loading_rate, \
+                  engine.STRATEGIES[args.strategy](), args.scale, \
+                  None if args.quiet else sys.stdout)
+    if args.replay:
+        feed = replay_feed(car, args.replay)
+    elif args.port is not None:
+        feed = socket_feed(car, args.floors, args.port)
+    else:
+        feed = stdin_feed(car, args.floors)
+    try:
+        asyncio.run(run_live(car, feed))
+    except (OSError, ValueError) as error:
+        print("error:", error, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print()
+    write_summary(car)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
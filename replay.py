@@ -0,0 +1,187 @@
+
+import io
+import mmap
+import os
+import sys
+
+import numpy
+
+from passengers import PassengerTable
+from workload import ELEVATOR_SPEEDS, LOADING_RATE
+
+
+# Binary log layout: MAGIC, the row count as a little-endian uint64, then
+# the arrival column (float64), the source column (int32) and the
+# destination column (int32), each count entries long.
+MAGIC = b"ELEVLOG1"
+HEADER = len(MAGIC) + 8
+CHUNK = 1 << 24   # bytes of CSV parsed at a time
+
+
+def _columns(path, count, mode):
+    '''Memory-map the three columns of a binary log'''
+
+    arrival = numpy.memmap(path, numpy.float64, mode, HEADER, (count,))
+    source = numpy.memmap(path, numpy.int32, mode, HEADER + 8 * count, (count,))
+    destination = numpy.memmap(path, numpy.int32, mode, HEADER + 12 * count, \
+                               (count,))
+    return arrival, source, destination
+
+
+def _check_sorted(path, arrival):
+    '''Raise ValueError unless arrival is in time order, reading it 1M
+    entries at a time'''
+
+    for start in range(0, len(arrival), 1 << 20):
+        chunk = arrival[max(start - 1, 0):start + (1 << 20)]
+        if numpy.any(chunk[1:] < chunk[:-1]):
+            raise ValueError("{}: arrivals are not in time order".format(path))
+
+
+def load_binary(path, check=False):
+    '''PassengerTable over a binary log. The columns are memory-mapped, so
+    opening only reads the header and rows are only read from disk as the
+    simulation reaches them. Time order is checked when a log is written
+    (convert, write_binary); check=True checks it again, which reads the
+    whole arrival column.'''
+
+    with open(path, "rb") as fp:
+        header = fp.read(HEADER)
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError("{} is not a binary elevator log".format(path))
+    count = int.from_bytes(header[len(MAGIC):], "little")
+    if os.path.getsize(path) != HEADER + 16 * count:
+        raise ValueError("{} is truncated".format(path))
+
+    arrival, source, destination = _columns(path, count, "r")
+    if check:
+        _check_sorted(path, arrival)
+    return PassengerTable(arrival, source, destination)
+
+
+def write_binary(path, table):
+    '''Write a PassengerTable (or list of passenger tuples) as a binary log'''
+
+    table = PassengerTable.from_tuples(table)
+    _check_sorted(path, table.arrival)
+    with open(path, "wb") as fp:
+        fp.write(MAGIC)
+        fp.write(len(table).to_bytes(8, "little"))
+        fp.write(table.arrival.tobytes())
+        fp.write(table.source.tobytes())
+        fp.write(table.destination.tobytes())
+
+
+def _header_length(data):
+    '''Length of the header line of a CSV log, or 0 if it has none'''
+
+    end = data.find(b"\n")
+    first = data[:end if end >= 0 else len(data)]
+    try:
+        float(first.split(b",")[0])
+        return 0
+    except ValueError:
+        return len(first) + 1
+
+
+def _read_csv(path, arrival=None, source=None, destination=None):
+    '''Read a CSV log of arrival_time,source_floor,destination_floor rows
+    (an optional header line is skipped) through a memory map, CHUNK bytes
+    at a time. With columns, parse the rows into them and return how many
+    there were; without, return an upper bound for sizing the columns.'''
+
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start = _header_length(data)
+            if arrival is None:
+                lines = 1
+                for offset in range(start, len(data), CHUNK):
+                    lines += data[offset:offset + CHUNK].count(b"\n")
+                return lines
+
+            rows = 0
+            while start < len(data):
+                end = data.find(b"\n", min(start + CHUNK, len(data)))
+                end = len(data) if end < 0 else end + 1
+                chunk = numpy.loadtxt(io.BytesIO(data[start:end]), \
+                                      delimiter=",", ndmin=2)
+                if len(chunk) and chunk.shape[1] != 3:
+                    raise ValueError("{}: expected 3 columns, found {}".\
+                                     format(path, chunk.shape[1]))
+                arrival[rows:rows + len(chunk)] = chunk[:, 0]
+                source[rows:rows + len(chunk)] = chunk[:, 1]
+                destination[rows:rows + len(chunk)] = chunk[:, 2]
+                rows += len(chunk)
+                start = end
+    return rows
+
+
+def load_csv(path):
+    '''PassengerTable of a CSV log, read in chunks straight into the
+    table's typed columns'''
+
+    size = _read_csv(path)
+    arrival = numpy.empty(size)
+    source = numpy.empty(size, numpy.int32)
+    destination = numpy.empty(size, numpy.int32)
+    rows = _read_csv(path, arrival, source, destination)
+    _check_sorted(path, arrival[:rows])
+    return PassengerTable(arrival[:rows], source[:rows], destination[:rows])
+
+
+def convert(csv_path, binary_path):
+    '''Convert a CSV log to a binary log chunk by chunk, never holding more
+    than one chunk of it in memory. Return the number of rows.'''
+
+    size = _read_csv(csv_path)
+    rows = 0
+    with open(binary_path, "wb") as fp:
+        fp.write(MAGIC)
+        fp.write(size.to_bytes(8, "little"))
+        fp.truncate(HEADER + 16 * size)
+    if size:
+        columns = _columns(binary_path, size, "r+")
+        rows = _read_csv(csv_path, *columns)
+        _check_sorted(csv_path, columns[0][:rows])
+        for column in columns:
+            column.flush()
+        if rows < size:
+            #blank lines took up room: write the rows again, packed
+            packed = PassengerTable(*(column[:rows] for column in columns))
+            write_binary(binary_path + ".tmp", packed)
+            del columns, packed
+            os.replace(binary_path + ".tmp", binary_path)
+    return rows
+
+
+def load(path, check=False):
+    '''PassengerTable of a CSV (.csv) or binary log; check=True also
+    checks the time order of a binary log (CSV logs always are)'''
+
+    if path.endswith(".csv"):
+        return load_csv(path)
+    return load_binary(path, check)
+
+
+_loaded = {}
+
+
+def replay_passengers(path, elevator_speeds=ELEVATOR_SPEEDS, \
+                      loading_rates=LOADING_RATE, rng=numpy.random):
+    '''Like workload.generate_passengers, but the passengers come from the
+    log at path; only the elevator speed and loading rate are drawn.
+    Each process loads a log once and reuses it.'''
+
+    if path not in _loaded:
+        _loaded[path] = load(path)
+    elevator_speed = elevator_speeds[rng.randint(len(elevator_speeds))]
+    loading_rate = loading_rates[rng.randint(len(loading_rates))]
+    return _loaded[path], elevator_speed, loading_rate
+
+
+if __name__ == "__main__":
+    # python replay.py traffic.csv traffic.log
+    print(" {} rows written to {}".format(convert(sys.argv[1], sys.argv[2]), \
+                                          sys.argv[2]))
@@ -0,0 +1,36 @@
+
+
+# Panels of the comparison report: (title, y label, statistics key)
+PANELS = [
+    ("Average Wait Time Comparison", "Average Wait Time (s)", "avg_wait_time"),
+    ("Average of Average Wait Times (all runs) Comparison", \
+     "Average Wait Time(s)", "avg_avg_wait_time"),
+    ("Average Total Time (all runs) Comparison", "Average Total Time (s)", \
+     "avg_total_time"),
+    ("Average Elevator Moves (all runs) Comparison", "Average Elevator Moves", \
+     "avg_moves"),
+]
+
+
+def plot_report(path, names, stats):
+    ''' Draw bar graphs of every panel for the named elevators' statistics
+    (from runner.summarize) into one image at path, without opening a
+    window. matplotlib is only imported here, so runs that do not ask for a
+    report never load it. '''
+
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    figure, axes = pyplot.subplots(2, 2, figsize=(12, 10))
+    pos = range(len(names))
+    for ax, (title, ylabel, key) in zip(axes.flat, PANELS):
+        ax.bar(pos, [elevator[key] for elevator in stats])
+        ax.set_title(title)
+        ax.set_xlabel("Simulation Name")
+        ax.set_ylabel(ylabel)
+        ax.set_xticks(pos)
+        ax.set_xticklabels(names, rotation=90)
+    figure.tight_layout()
+    figure.savefig(path)
+    pyplot.close(figure)
@@ -0,0 +1,443 @@
+
+import functools
+import os
+import pickle
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+import bank
+import batch
+import engine
+import profiling
+import replay
+import tracing
+from stats import RunningStats, confidence_interval, half_width
+from workload import generate_passengers, generate_profile_passengers
+
+
+# Confidence level of the paired comparisons
+CONFIDENCE = 0.95
+
+# Fewest rounds a sequential run stops after (see Summary.settled)
+MIN_SETTLED = 30
+
+# Per-round metrics compared in pairs: Summary key, label and unit
+PAIRED = (("waits", "average wait time", "seconds"), \
+          ("times", "total time", "seconds"), \
+          ("moves", "moves", "moves"))
+
+
+def seed_round(seed, round_index):
+    '''Seed numpy.random and random for one round. Every round gets its own
+    streams from (seed, round_index), so a round's result does not depend on
+    which process runs it or on the rounds before it.'''
+
+    numpy.random.seed([seed, round_index])
+    random.seed(round_stream(seed, round_index))
+
+
+def round_stream(seed, round_index):
+    '''Seed of a round's random stream. Each elevator of a round starts
+    its random choices from it (common random numbers), so the elevators
+    differ only by their algorithm.'''
+
+    return seed * 2**32 + round_index
+
+
+def run_rounds(round_function, rounds, args=(), workers=1):
+    '''Call round_function(round_index, *args) for every round and yield the
+    results in round order. With more than one worker the rounds are spread
+    over a process pool; round_function must then be a module-level
+    function and its results picklable.'''
+
+    yield from run_jobs(round_function, range(rounds), args, workers)
+
+
+def run_jobs(function, jobs, args=(), workers=1):
+    '''Call function(job, *args) for every job and yield the results in
+    job order, spreading the jobs over a process pool when there is more
+    than one worker'''
+
+    if workers == 1:
+        for job in jobs:
+            yield function(job, *args)
+        return
+
+    jobs = list(jobs)
+    call = functools.partial(_call_job, function, args)
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(workers) as pool:
+        yield from pool.map(call, jobs, chunksize=chunksize)
+
+
+def _call_job(function, args, job):
+    return function(job, *args)
+
+
+def compare_round(round_index, seed, capacity, strategies, \
+                  trace_level=tracing.OFF, cars=1, dispatcher="eta", log=None, \
+                  profile=None, lobby_bias=1, instrument=False):
+    '''Run one round of the named elevators (keys of engine.STRATEGIES) on
+    one shared workload seeded from (seed, round_index), or on the traffic
+    recorded in the log file at log (see replay.py), or on a day of
+    traffic following the named daily profile (see workload.PROFILES)
+    with that lobby bias; with more than one
+    car each elevator is a bank.Bank of cars using that policy. Return each
+    elevator's (total time, moves, average wait time, wait statistics),
+    the round's trace records and, with instrument, the round's
+    profiling.Profiler (None without)'''
+
+    seed_round(seed, round_index)
+    tracer = tracing.Tracer(trace_level)
+    tracer.run = round_index
+    profiler = profiling.Profiler() if instrument else None
+    passenger_list, elevator_speed, loading_rate = \
+        round_workload(log, profile, lobby_bias)
+
+    round_result = []
+    for name in strategies:
+        random.seed(round_stream(seed, round_index))
+        if cars > 1:
+            simulation = bank.Bank(passenger_list, cars, capacity, elevator_speed, \
+                                   loading_rate, name, dispatcher, tracer)
+        else:
+            simulation = engine.Simulation(passenger_list, capacity, \
+                elevator_speed, loading_rate, tracer, engine.STRATEGIES[name]())
+        if profiler is not None:
+            profiler.instrument(simulation)
+        tot_time, tot_moves, wait_stats = simulation.run()
+        round_result.append((tot_time, tot_moves, wait_stats.mean, wait_stats))
+
+    return round_result, tracer.records(), profiler
+
+
+def round_workload(log=None, profile=None, lobby_bias=1):
+    '''The round's (passenger_list, elevator_speed, loading_rate): replayed
+    from the log at log, a day of the named profile, or random passengers'''
+
+    if log:
+        return replay.replay_passengers(log)
+    if profile:
+        return generate_profile_passengers(profile, lobby_bias=lobby_bias)
+    return generate_passengers()
+
+
+def compare_batch(round_indices, seed, capacity, strategies, \
+                  trace_level=tracing.OFF, cars=1, dispatcher="eta", log=None, \
+                  profile=None, lobby_bias=1, instrument=False):
+    '''compare_round for a block of rounds at once: every round gets the
+    workload compare_round would give it, and each named elevator runs
+    all of them in lockstep in one batch.BatchSimulation. Return a list
+    with one (round_result, trace_records, None) per round. Only single
+    cars are batched and only summary rows are traced; cars, dispatcher
+    and instrument are accepted so the arguments match compare_round.'''
+
+    if cars > 1 or trace_level >= tracing.MOVES or instrument:
+        raise ValueError("batched rounds run single cars without move traces "
+                         "or instrumentation")
+    workloads = []
+    for round_index in round_indices:
+        seed_round(seed, round_index)
+        workloads.append(round_workload(log, profile, lobby_bias))
+    keys = [round_stream(seed, round_index) for round_index in round_indices]
+
+    by_elevator = [batch.BatchSimulation(workloads, capacity, name, keys).run() \
+                   for name in strategies]
+    results = []
+    for round_index, runs in zip(round_indices, zip(*by_elevator)):
+        tracer = tracing.Tracer(trace_level)
+        round_result = []
+        for name, (tot_time, tot_moves, wait_stats) in zip(strategies, runs):
+            if tracer.summary:
+                tracer.add_summary((round_index, name, tot_time, tot_moves, \
+                                    wait_stats.mean, wait_stats.count))
+            round_result.append((tot_time, tot_moves, wait_stats.mean, wait_stats))
+        results.append((round_result, tracer.records(), None))
+    return results
+
+
+class Summary:
+    '''Per-elevator statistics of a comparison, fed one round at a time.
+
+    Each round is an iterable of (total_time, moves, average_wait,
+    wait_stats) tuples, one per elevator. Every elevator of a round runs on
+    the same workload, so besides each elevator's own statistics the
+    Summary keeps the per-round differences from the first elevator,
+    whose spread leaves out the round-to-round swing of the workload both
+    share. Only running statistics are kept, so memory stays the same
+    however many rounds there are, and a Summary pickles small enough to
+    checkpoint.'''
+
+    def __init__(self):
+        self.rounds = 0
+        self.elevators = None
+
+    def add(self, result):
+        if self.elevators is None:
+            self.elevators = [{"times": RunningStats(), "moves": RunningStats(), \
+                               "waits": RunningStats(), \
+                               "passengers": RunningStats(), \
+                               "differences": {key: RunningStats() for key, \
+                                               label, unit in PAIRED}, \
+                               "wins": 0, "move_wins": 0} for r in result]
+        first_time, first_moves, first_wait = result[0][:3]
+        for elevator, (tot_time, moves, avg_wait, wait_stats) in \
+                zip(self.elevators, result):
+            elevator["times"].add(tot_time)
+            elevator["moves"].add(moves)
+            elevator["waits"].add(avg_wait)
+            elevator["passengers"].merge(wait_stats)
+            elevator["last_wait"] = avg_wait
+            differences = elevator["differences"]
+            differences["times"].add(tot_time - first_time)
+            differences["moves"].add(moves - first_moves)
+            differences["waits"].add(avg_wait - first_wait)
+        self.elevators[_winner([r[2] for r in result])]["wins"] += 1
+        self.elevators[_winner([r[1] for r in result])]["move_wins"] += 1
+        self.rounds += 1
+
+    def stats(self):
+        '''One dict per elevator with the averages, minimums and maximums
+        across rounds, the last round's average wait, the spread of every
+        passenger's wait across all rounds and the number of rounds it won
+        on average wait and on moves. A tie goes to the elevator listed
+        later, as it always has. Every elevator after the first also gets
+        "paired": per PAIRED metric the mean difference from the first
+        elevator over the rounds, its CONFIDENCE interval ("low", "high")
+        and the half-width the interval would have had from as many
+        rounds on independent workloads ("unpaired").'''
+
+        stats = []
+        for number, elevator in enumerate(self.elevators):
+            times, moves, waits = elevator["times"], elevator["moves"], \
+                                  elevator["waits"]
+            passengers = elevator["passengers"]
+            stats.append({
+                "avg_wait_time": elevator["last_wait"],
+                "avg_avg_wait_time": waits.mean,
+                "avg_total_time": times.mean,
+                "min_total_time": times.min,
+                "max_total_time": times.max,
+                "avg_moves": moves.mean,
+                "min_moves": moves.min,
+                "max_moves": moves.max,
+                "std_wait_time": passengers.std,
+                "p50_wait_time": passengers.quantile(0.5),
+                "p95_wait_time": passengers.quantile(0.95),
+                "p99_wait_time": passengers.quantile(0.99),
+                "wait_stats": passengers,
+                "wins": elevator["wins"],
+                "move_wins": elevator["move_wins"],
+                "paired": self._paired(elevator) if number else None,
+            })
+        return stats
+
+    def settled(self, precision=None):
+        '''True once, for every elevator after the first, the CONFIDENCE
+        interval of its average wait difference from the first excludes 0
+        or, given a precision in seconds, is at most +/- precision wide.
+        Never true before MIN_SETTLED rounds, so a handful of early rounds
+        cannot end a run. This is looked at again and again as rounds come
+        in, which makes a difference that is not there somewhat likelier to
+        pass for one than a single interval would.'''
+
+        if self.rounds < MIN_SETTLED:
+            return False
+        for elevator in self.elevators[1:]:
+            waits = self._paired(elevator)["waits"]
+            clear = waits["low"] > 0 or waits["high"] < 0
+            narrow = precision is not None and \
+                     (waits["high"] - waits["low"]) / 2 <= precision
+            if not (clear or narrow):
+                return False
+        return True
+
+    def _paired(self, elevator):
+        first = self.elevators[0]
+        paired = {}
+        for key, label, unit in PAIRED:
+            differences = elevator["differences"][key]
+            low, high = confidence_interval(differences, CONFIDENCE)
+            paired[key] = {"mean": differences.mean, "low": low, "high": high, \
+                           "unpaired": half_width(elevator[key].variance + \
+                                                  first[key].variance, \
+                                                  self.rounds, CONFIDENCE)}
+        return paired
+
+
+def summarize(round_results):
+    '''Merge per-round results into per-elevator statistics (see Summary).
+    round_results is read once, so it can be the generator of a running
+    comparison.'''
+
+    summary = Summary()
+    for result in round_results:
+        summary.add(result)
+    return summary.stats()
+
+
+def run_comparison(round_function, rounds, args=(), workers=1, tracer=None, \
+                   checkpoint=None, every=100, resume=False, profiler=None, \
+                   batch=1, sequential=False, precision=None, look=100):
+    '''Run round_function(round_index, *args) for every round, like
+    run_rounds, and return the Summary of the results. round_function
+    returns the round's results, its trace records and optionally a
+    profiling.Profiler. Trace records go to tracer and round profilers are
+    merged into profiler. With a batch size above 1, round_function is
+    called with ranges of up to batch round indexes instead (compare_batch)
+    and returns a list of those per-round results.
+
+    A sequential run takes rounds as only the most to run: the rounds go in
+    blocks of look and the run stops before the next block once
+    summary.settled(precision) is true. summary.rounds then says how many
+    were used; as every round has its own seed they are exactly the first
+    rounds of a longer run.
+
+    With a checkpoint path the summary, the trace file positions and the
+    run's arguments and stopping rule are saved there every every rounds
+    and when the run is interrupted, and the file is removed once the run
+    completes. resume picks up from that file and refuses one written for
+    a different run. Every round is seeded from its own index, so
+    the resumed run ends with exactly the statistics and trace records of
+    an uninterrupted one.'''
+
+    #look and precision only matter to a sequential run
+    stopping = [sequential, precision, look] if sequential else [False]
+    summary = Summary()
+    if resume:
+        state = load_checkpoint(checkpoint)
+        if state["rounds"] != rounds or state["args"] != list(args) or \
+           state.get("stopping", [False]) != stopping:
+            raise ValueError("{} was written for a different run".format(checkpoint))
+        summary = state["summary"]
+        if profiler is not None and state.get("profile") is not None:
+            profiler.merge(state["profile"])
+        if tracer is not None:
+            tracer.resume(state["trace"])
+
+    def save():
+        if checkpoint:
+            positions = tracer.positions() if tracer is not None else {}
+            save_checkpoint(checkpoint, {"rounds": rounds, "args": list(args), \
+                                         "summary": summary, "trace": positions, \
+                                         "profile": profiler, \
+                                         "stopping": stopping})
+
+    def results(start, stop):
+        if batch > 1:
+            blocks = [range(i, min(i + batch, stop)) \
+                      for i in range(start, stop, batch)]
+            return (result for block in run_jobs(round_function, blocks, args, \
+                                                 workers) for result in block)
+        return run_jobs(round_function, range(start, stop), args, workers)
+
+    def blocks():
+        start = summary.rounds
+        while start < rounds:
+            #checks fall on multiples of look, wherever a resumed run starts
+            if start % look == 0 and summary.settled(precision):
+                return
+            stop = min((start // look + 1) * look, rounds)
+            yield from results(start, stop)
+            start = stop
+
+    try:
+        for round_result, trace, *profile in \
+                blocks() if sequential else results(summary.rounds, rounds):
+            if tracer is not None:
+                tracer.extend(trace)
+            if profiler is not None and profile and profile[0] is not None:
+                profiler.merge(profile[0])
+            summary.add(round_result)
+            if summary.rounds % every == 0 and summary.rounds < rounds:
+                save()
+    except KeyboardInterrupt:
+        save()
+        raise
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return summary
+
+
+def save_checkpoint(path, state):
+    '''Write state to path atomically, so an interruption while saving
+    leaves the previous checkpoint in place'''
+
+    with open(path + ".tmp", "wb") as fp:
+        pickle.dump(state, fp, pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def load_checkpoint(path):
+    with open(path, "rb") as fp:
+        return pickle.load(fp)
+
+
+def _winner(values):
+    '''Index of the smallest value, ties going to the later index'''
+
+    best = 0
+    for i in range(1, len(values)):
+        if values[i] <= values[best]:
+            best = i
+    return best
+
+
+def write_statistics(fp, names, stats):
+    '''Write the per-elevator statistics from summarize() to fp'''
+
+    for name, elevator in zip(names, stats):
+        print(file=fp)
+        print("{} Elevator Statistics".format(name.capitalize()), file=fp)
+        print(file=fp)
+        print(" average wait time: {:.4f} seconds".format(\
+              elevator["avg_wait_time"]), file=fp)
+        print(" average of average wait times across all runs: {:.4f} seconds".\
+              format(elevator["avg_avg_wait_time"]), file=fp)
+        print(" average total time across all runs: {:.4f} seconds".format(\
+              elevator["avg_total_time"]), file=fp)
+        print(" average total elevator moves across all runs: {:.4f} moves".\
+              format(elevator["avg_moves"]), file=fp)
+        print(" minimum total time across all runs: {} seconds".format(\
+              round(elevator["min_total_time"], 4)), file=fp)
+        print(" maximum total time across all runs: {} seconds".format(\
+              round(elevator["max_total_time"], 4)), file=fp)
+        print(" minimum elevator moves across all runs: {} moves".format(\
+              round(elevator["min_moves"], 4)), file=fp)
+        print(" maximum elevator moves across all runs: {} moves".format(\
+              round(elevator["max_moves"], 4)), file=fp)
+        print(" wait time standard deviation across all runs: {:.4f} seconds".\
+              format(elevator["std_wait_time"]), file=fp)
+        print(" wait time p50 / p95 / p99 across all runs: {:.4f} / {:.4f} / {:.4f} "
+              "seconds".format(elevator["p50_wait_time"], \
+              elevator["p95_wait_time"], elevator["p99_wait_time"]), file=fp)
+        print(" wins on average wait time: {}".format(elevator["wins"]), file=fp)
+    write_paired(fp, names, stats)
+
+
+def write_paired(fp, names, stats):
+    '''Write the paired differences of the statistics from summarize()
+    to fp: every elevator against the first, on the same workloads'''
+
+    if len(stats) < 2:
+        return
+    print(file=fp)
+    print("Paired differences from the {} Elevator, {:.0%} confidence".format(\
+          names[0].capitalize(), CONFIDENCE), file=fp)
+    for name, elevator in zip(names[1:], stats[1:]):
+        print(file=fp)
+        for key, label, unit in PAIRED:
+            paired = elevator["paired"][key]
+            if paired["low"] > 0:
+                verdict = "higher"
+            elif paired["high"] < 0:
+                verdict = "lower"
+            else:
+                verdict = "no clear difference"
+            print(" {} Elevator {}: {:+.4f} {} [{:+.4f}, {:+.4f}] {} "
+                  "(unpaired: +/-{:.4f})".format(name.capitalize(), label, \
+                  paired["mean"], unit, paired["low"], paired["high"], \
+                  verdict, paired["unpaired"]), file=fp)
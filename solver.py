@@ -0,0 +1,306 @@
+
+import argparse
+import math
+import sys
+import time
+
+import engine
+import runner
+import workload
+from passengers import PassengerTable
+
+
+# Heuristic elevators and the car rules each is measured against
+COLLECTIVE = {"strategy": False, "optimal": True}
+
+
+class Solver:
+    '''Best schedule for one car on a small passenger list, found offline
+    by depth-first branch-and-bound.
+
+    The car follows the engine's rules (engine.Simulation): it loads at a
+    stop, picks a floor to go to or sleeps until the next arrival, travels,
+    unloads, and so on, with boarding first come first served up to
+    capacity. Only the choice of floor, or of sleeping, is left to the
+    search, so every elevator in engine.STRATEGIES runs one of the
+    schedules searched and the best of them bounds what any of them could
+    do. A collective car (the optimal elevator's rules) also boards at the
+    floors it passes. Trips on which nobody gets on or off are not tried;
+    none of the engine's elevators makes them. Wait is measured like the
+    engine does, as alight time minus source floor.
+
+    A state is (time, floor, arrivals released, boarded and delivered
+    passengers as bitsets). The search tries the most promising floor
+    first, prunes a branch once its cost so far plus a lower bound on the
+    rest (every passenger served by a car that goes straight to them)
+    cannot beat the best schedule yet, and skips states already reached
+    at no lower cost. It stops when budget seconds run out; best then
+    holds the best schedule found so far and proven says whether the
+    search finished.
+    '''
+
+    def __init__(self, passenger_list, capacity, elevator_speed, loading_rate, \
+                 collective=False):
+        table = PassengerTable.from_tuples(passenger_list)
+        if collective:
+            #the optimal elevator ignores people staying on their floor
+            table = engine.OptimalStrategy().prepare(table)
+        self.arrival = table.arrival.tolist()
+        self.source = table.source.tolist()
+        self.destination = table.destination.tolist()
+        self.count = len(self.arrival)
+        self.everyone = (1 << self.count) - 1
+        self.capacity = capacity
+        self.speed = elevator_speed
+        self.rate = loading_rate
+        self.collective = collective
+
+        self.best = math.inf         #sum of waits of the best schedule found
+        self.schedule = None         #its floors, None for sleeping
+        self.proven = False
+        self.nodes = 0
+        self.seen = {}               #state -> lowest cost it was reached at
+
+    def solve(self, budget=10.0, incumbent=math.inf):
+        ''' Search for budget seconds at most and return the best average
+        wait found, or the average of incumbent (a sum of waits some known
+        schedule achieves) if nothing better turns up '''
+
+        self.best = incumbent
+        self.deadline = time.perf_counter() + budget
+        if not self.count:
+            self.best, self.proven = 0.0, True
+            return 0.0
+
+        #the car opens its doors at floor 0 at time 0
+        cursor = self.release(0, 0)
+        boarded, loaded = self.board(0, cursor, 0, self.capacity)
+        now = loaded * self.rate
+        cursor = self.release(cursor, now)
+        self.proven = self.search(now, 0, cursor, boarded, 0, 0.0, [])
+        return self.best / self.count
+
+    def root_bound(self):
+        '''Lower bound on the average wait of any schedule'''
+        if not self.count:
+            return 0.0
+        return self.bound(0, 0, 0, 0) / self.count
+
+    ############################### CAR MOVES ##################################
+
+    def release(self, cursor, now):
+        while cursor < self.count and self.arrival[cursor] <= now:
+            cursor += 1
+        return cursor
+
+    def board(self, floor, cursor, boarded, room):
+        '''Board up to room of the passengers released and waiting at floor,
+        earliest first; return the new boarded bitset and how many got on'''
+
+        loaded = 0
+        for index in range(cursor):
+            if loaded == room:
+                break
+            if self.source[index] == floor and not boarded >> index & 1:
+                boarded |= 1 << index
+                loaded += 1
+        return boarded, loaded
+
+    def visit(self, now, floor, target, cursor, boarded, delivered):
+        '''Go from floor to target, unload, then load there. Return the
+        state at the next departure and the waits of those who got off.'''
+
+        if self.collective and target != floor:
+            step = 1 if target > floor else -1
+            while floor != target:
+                floor += step
+                now += self.speed
+                cursor = self.release(cursor, now)
+                room = self.capacity - _bits(boarded & ~delivered)
+                boarded, loaded = self.board(floor, cursor, boarded, room)
+        else:
+            now += abs(target - floor) * self.speed
+            cursor = self.release(cursor, now)
+
+        leaving = 0
+        for index in _members(boarded & ~delivered):
+            if self.destination[index] == target:
+                leaving |= 1 << index
+        now += _bits(leaving) * self.rate
+        waits = sum(now - self.source[index] for index in _members(leaving))
+        delivered |= leaving
+        if delivered == self.everyone:
+            return (now, target, cursor, boarded, delivered), waits
+
+        cursor = self.release(cursor, now)
+        room = self.capacity - _bits(boarded & ~delivered)
+        boarded, loaded = self.board(target, cursor, boarded, room)
+        now += loaded * self.rate
+        return (now, target, self.release(cursor, now), boarded, delivered), waits
+
+    ################################ SEARCH ####################################
+
+    def bound(self, now, floor, boarded, delivered):
+        '''Least the undelivered passengers' waits can add up to: each one
+        served as if the car went straight to them and then to their
+        destination'''
+
+        total = 0.0
+        board_rate = 0 if self.collective else self.rate
+        for index in _members(self.everyone & ~delivered):
+            destination = self.destination[index]
+            if boarded >> index & 1:
+                alight = now + abs(floor - destination) * self.speed
+            else:
+                source = self.source[index]
+                alight = max(self.arrival[index], \
+                             now + abs(floor - source) * self.speed) + board_rate + \
+                         abs(source - destination) * self.speed
+            total += alight + self.rate - self.source[index]
+        return total
+
+    def search(self, now, floor, cursor, boarded, delivered, cost, stops):
+        '''Extend the schedule stops from the car departing floor at now;
+        return False if the time budget ran out'''
+
+        self.nodes += 1
+        if self.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            return False
+        key = (now, floor, cursor, boarded, delivered)
+        if self.seen.get(key, math.inf) <= cost:
+            return True
+        self.seen[key] = cost
+
+        children = []
+        targets = {self.destination[index] for index in \
+                   _members(boarded & ~delivered)}
+        targets.update(self.source[index] for index in \
+                       _members(self.everyone & ~boarded))
+        for target in targets:
+            state, waits = self.visit(now, floor, target, cursor, boarded, delivered)
+            if state[3:] != (boarded, delivered):
+                children.append((cost + waits, target, state))
+        if cursor < self.count:
+            #sleep until the next arrival, as an idle car does
+            idle = max(1, math.ceil(self.arrival[cursor] - now))
+            state = (now + idle, floor, self.release(cursor, now + idle), \
+                     boarded, delivered)
+            children.append((cost, None, state))
+
+        ranked = sorted(((child_cost + self.bound(*state[:2], *state[3:]), \
+                          child_cost, target, state) \
+                         for child_cost, target, state in children), \
+                        key=lambda child: child[0])
+        for estimate, child_cost, target, state in ranked:
+            if estimate >= self.best:
+                break
+            if state[4] == self.everyone:
+                self.best, self.schedule = child_cost, stops + [target]
+                continue
+            stops.append(target)
+            finished = self.search(*state, child_cost, stops)
+            stops.pop()
+            if not finished:
+                return False
+        return True
+
+
+def _bits(bitset):
+    return bin(bitset).count("1")
+
+
+def _members(bitset):
+    '''Indices of the set bits of bitset'''
+    index = 0
+    while bitset:
+        if bitset & 1:
+            yield index
+        bitset >>= 1
+        index += 1
+
+
+def heuristic_waits(name, passenger_list, capacity, elevator_speed, loading_rate):
+    '''Average and sum of the (unrounded) waits of the named elevator'''
+
+    simulation = engine.Simulation(passenger_list, capacity, elevator_speed, \
+                                   loading_rate, strategy=engine.STRATEGIES[name]())
+    simulation.run()
+    table = simulation.passengers
+    if not len(table):
+        return 0.0, 0.0
+    total = float((table.alight_time - table.source).sum())
+    return total / len(table), total
+
+
+def optimality_gaps(passenger_list, capacity, elevator_speed, loading_rate, \
+                    names=("strategy", "optimal"), budget=10.0):
+    '''For each named elevator: its average wait, the best average wait a
+    car under the same rules could reach (or the best found within budget
+    seconds), whether that is proven optimal and the gap between the two
+    as a fraction of the best'''
+
+    rows = []
+    for name in names:
+        average, total = heuristic_waits(name, passenger_list, capacity, \
+                                         elevator_speed, loading_rate)
+        solver = Solver(passenger_list, capacity, elevator_speed, loading_rate, \
+                        COLLECTIVE[name])
+        best = solver.solve(budget, total)
+        rows.append({"elevator": name, "average_wait": average, \
+                     "best_wait": best, "proven": solver.proven, \
+                     "lower_bound": solver.root_bound(), \
+                     "gap": (average - best) / best if best else 0.0, \
+                     "nodes": solver.nodes})
+    return rows
+
+
+def main(argv=None):
+    ''' Command-line entry point; returns the process exit code '''
+
+    parser = argparse.ArgumentParser(description="Measure how far the "
+                                     "heuristic elevators are from the best "
+                                     "schedule on small workloads.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--instances", type=int, default=5)
+    parser.add_argument("--passengers", type=int, default=8)
+    parser.add_argument("--floors", type=int, default=5, \
+                        help="top floor, floors are 0 to this (default 5)")
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--budget", type=float, default=10.0, \
+                        help="seconds of search per elevator and instance "
+                        "(default 10)")
+    parser.add_argument("--elevators", nargs="+", choices=sorted(COLLECTIVE), \
+                        default=["strategy", "optimal"])
+    args = parser.parse_args(argv)
+    if args.instances < 1 or args.passengers < 1 or args.floors < 1 or \
+       args.capacity < 1 or args.budget <= 0:
+        print("error: instances, passengers, floors, capacity and budget must "
+              "be positive", file=sys.stderr)
+        return 1
+
+    print("{:>9s}{:<10s}{:>12s}{:>12s}{:>9s}{:>10s}{:>10s}".format(\
+          "instance ", "elevator", "avg wait", "best wait", "gap", "proven", \
+          "nodes"))
+    gaps = {name: [] for name in args.elevators}
+    for instance in range(args.instances):
+        runner.seed_round(args.seed, instance)
+        passenger_list, elevator_speed, loading_rate = \
+            workload.generate_passengers(args.floors, args.passengers)
+        for row in optimality_gaps(passenger_list, args.capacity, elevator_speed, \
+                                   loading_rate, args.elevators, args.budget):
+            gaps[row["elevator"]].append(row["gap"])
+            print("{:>8d} {:<10s}{:>12.4f}{:>12.4f}{:>9.1%}{:>10s}{:>10d}".format(\
+                  instance, row["elevator"], row["average_wait"], \
+                  row["best_wait"], row["gap"], \
+                  "yes" if row["proven"] else "no", row["nodes"]))
+
+    print()
+    for name in args.elevators:
+        print(" {} Elevator: mean gap {:.1%}, worst {:.1%}".format(\
+              name.capitalize(), sum(gaps[name]) / len(gaps[name]), \
+              max(gaps[name])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+
+import math
+import statistics
+
+import numpy
+
+
+class QuantileSketch:
+    '''Mergeable quantile sketch with bounded relative error.
+
+    Values are counted in logarithmic buckets, (gamma**(k-1), gamma**k] for
+    bucket k, so any quantile comes back within relative_accuracy of a
+    value of the stream while the number of buckets only grows with the
+    logarithm of the range of values, not with how many were added.
+    Sketches with the same accuracy merge by adding their bucket counts.
+    '''
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}   #bucket -> count of values > 0
+        self.negative = {}   #bucket -> count of values < 0, by magnitude
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        if value > 0:
+            bucket = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < 0:
+            bucket = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def extend(self, values):
+        '''add() every value of a NumPy array at once'''
+
+        values = numpy.asarray(values, dtype=float)
+        for buckets, magnitudes in ((self.positive, values[values > 0]), \
+                                    (self.negative, -values[values < 0])):
+            keys, counts = numpy.unique(numpy.ceil(numpy.log(magnitudes) / \
+                                        self.log_gamma), return_counts=True)
+            keys = keys.astype(int).tolist()
+            if not buckets:
+                buckets.update(zip(keys, counts.tolist()))
+                continue
+            for bucket, count in zip(keys, counts.tolist()):
+                buckets[bucket] = buckets.get(bucket, 0) + count
+        self.zeros += int(numpy.count_nonzero(values == 0))
+        self.count += len(values)
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches of different accuracy")
+        for mine, theirs in ((self.positive, other.positive), \
+                             (self.negative, other.negative)):
+            for bucket, count in theirs.items():
+                mine[bucket] = mine.get(bucket, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        '''Value at quantile q (0 to 1), or None for an empty sketch'''
+
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self.value(bucket)
+        seen += self.zeros
+        if seen > rank:
+            return 0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self.value(bucket)
+        return self.value(max(self.positive))
+
+    def value(self, bucket):
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+
+class RunningStats:
+    '''Streaming statistics of a stream of numbers in constant memory:
+    count, sum, mean, variance (Welford's method), minimum, maximum and
+    quantiles from a QuantileSketch.
+
+    merge() combines two RunningStats into the statistics of both streams,
+    so rounds and worker processes can each keep their own and be combined
+    afterwards. The mean is the sum over the count, exactly what the old
+    sum(list)/len(list) gave.
+    '''
+
+    def __init__(self, relative_accuracy=0.01):
+        self.count = 0
+        self.total = 0
+        self.running_mean = 0.0
+        self.m2 = 0.0        #sum of squared differences from the mean
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.running_mean
+        self.running_mean += delta / self.count
+        self.m2 += delta * (value - self.running_mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        self.sketch.add(value)
+
+    def extend(self, values):
+        '''add() every value of a NumPy array at once'''
+
+        values = numpy.asarray(values, dtype=float)
+        if not len(values):
+            return
+        batch = self if self.count == 0 else \
+                RunningStats(self.sketch.relative_accuracy)
+        batch.count = len(values)
+        batch.total = float(values.sum())
+        batch.running_mean = batch.total / batch.count
+        batch.m2 = float(numpy.square(values - batch.running_mean).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        batch.sketch.extend(values)
+        if batch is not self:
+            self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.running_mean, self.m2 = other.running_mean, other.m2
+            self.min, self.max = other.min, other.max
+        else:
+            count = self.count + other.count
+            delta = other.running_mean - self.running_mean
+            self.running_mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    @property
+    def variance(self):
+        '''Sample variance'''
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        '''Value at quantile q (0 to 1), 0 with no values, like mean'''
+        if self.count == 0:
+            return 0
+        return self.sketch.quantile(q)
+
+
+def t_quantile(p, df):
+    '''Quantile p of Student's t distribution with df degrees of freedom.
+    Below 30 degrees of freedom it is found from the exact distribution
+    function by bisection; from 30 up the Cornish-Fisher expansion of the
+    normal quantile is within 0.1%.'''
+
+    if df < 30 and df == int(df):
+        if p < 0.5:
+            return -t_quantile(1 - p, df)
+        low, high = 0.0, 1.0
+        while _t_cdf(high, df) < p:
+            high *= 2
+        for i in range(100):
+            middle = (low + high) / 2
+            if _t_cdf(middle, df) < p:
+                low = middle
+            else:
+                high = middle
+        return (low + high) / 2
+
+    z = statistics.NormalDist().inv_cdf(p)
+    return z + (z**3 + z) / (4 * df) + \
+           (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2) + \
+           (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+
+
+def _t_cdf(t, df):
+    '''Distribution function of Student's t at t >= 0 for a whole number
+    df of degrees of freedom, by the finite series in the angle
+    atan(t / sqrt(df))'''
+
+    theta = math.atan(t / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        term, total = 1.0, 1.0 if df > 1 else 0.0
+        for k in range(1, (df - 1) // 2):
+            term *= cos2 * 2 * k / (2 * k + 1)
+            total += term
+        central = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    else:
+        term, total = 1.0, 1.0
+        for k in range(1, df // 2):
+            term *= cos2 * (2 * k - 1) / (2 * k)
+            total += term
+        central = math.sin(theta) * total
+    return (1 + central) / 2
+
+
+def half_width(variance, count, level=0.95):
+    '''Half-width of the t confidence interval at level for the mean of
+    count values with that sample variance (infinite below 2 values)'''
+
+    if count < 2:
+        return math.inf
+    return t_quantile((1 + level) / 2, count - 1) * math.sqrt(variance / count)
+
+
+def confidence_interval(running, level=0.95):
+    '''(low, high) confidence interval at level for the mean of the values
+    in a RunningStats'''
+
+    h = half_width(running.variance, running.count, level)
+    return running.mean - h, running.mean + h
@@ -0,0 +1,186 @@
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+
+import numpy
+
+import engine
+import runner
+import workload
+from stats import RunningStats
+
+
+# Swept parameters, in table column order
+PARAMETERS = ("capacity", "elevator_speed", "loading_rate", "arrival_rate", \
+              "strategy")
+RESULTS = ("avg_total_time", "avg_moves", "avg_wait_time", "std_wait_time")
+
+
+def grid(space):
+    '''Every combination of the levels in space (parameter -> list of levels)'''
+
+    levels = [space[name] for name in PARAMETERS]
+    return [dict(zip(PARAMETERS, cell)) for cell in itertools.product(*levels)]
+
+
+def sample(space, cells, method="random", seed=0):
+    '''cells combinations drawn from space (parameter -> list of levels).
+    "random" picks each level uniformly; "latin" is a Latin hypercube over
+    the level indices, so every parameter's levels are covered as evenly as
+    cells allows.'''
+
+    rng = numpy.random.RandomState(seed)
+    columns = []
+    for name in PARAMETERS:
+        count = len(space[name])
+        if method == "latin":
+            strata = (rng.permutation(cells) + rng.uniform(size=cells)) / cells
+            index = (strata * count).astype(int)
+        else:
+            index = rng.randint(count, size=cells)
+        columns.append([space[name][i] for i in index])
+    return [dict(zip(PARAMETERS, cell)) for cell in zip(*columns)]
+
+
+def cell_key(cell, rounds, seed, floors, passengers):
+    '''Hash of everything a cell's result depends on'''
+
+    identity = dict(cell, rounds=rounds, seed=seed, floors=floors, \
+                    passengers=passengers)
+    for name in ("elevator_speed", "loading_rate", "arrival_rate"):
+        identity[name] = float(identity[name])   #1 and 1.0 are the same cell
+    text = json.dumps(identity, sort_keys=True)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def run_cell(cell, rounds, seed, floors, passengers):
+    '''Simulate one cell for rounds rounds and return its averages and the
+    standard deviation of the average wait across rounds. Round i uses the
+    same seed in every cell, so cells see the same traffic.'''
+
+    total_times = RunningStats()
+    moves = RunningStats()
+    waits = RunningStats()
+    for round_index in range(rounds):
+        runner.seed_round(seed, round_index)
+        passenger_list, elevator_speed, loading_rate = \
+            workload.generate_passengers(floors, passengers, \
+                                         cell["arrival_rate"], \
+                                         [cell["elevator_speed"]], \
+                                         [cell["loading_rate"]])
+        tot_time, tot_moves, wait_stats = engine.Simulation(passenger_list, \
+            cell["capacity"], elevator_speed, loading_rate, \
+            strategy=engine.STRATEGIES[cell["strategy"]]()).run()
+        total_times.add(tot_time)
+        moves.add(tot_moves)
+        waits.add(wait_stats.mean)
+
+    return {"avg_total_time": total_times.mean, "avg_moves": moves.mean, \
+            "avg_wait_time": waits.mean, "std_wait_time": waits.std}
+
+
+def run_sweep(cells, rounds, seed, floors=workload.FLOORS, \
+              passengers=workload.PASSENGERS, workers=1, cache="sweep_cache"):
+    '''Return one result dict (parameters and averages) per cell. Results
+    already in the cache directory are reused; only new cells are run, in
+    parallel and each once however often it was drawn, and then added to
+    the cache.'''
+
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+
+    results = [None] * len(cells)
+    missing = {}   #key -> (cell, cache path, indexes of the cells drawn)
+    for i, cell in enumerate(cells):
+        key = cell_key(cell, rounds, seed, floors, passengers)
+        path = os.path.join(cache, key + ".json") if cache else None
+        if key in missing:
+            missing[key][2].append(i)
+            continue
+        if path and os.path.exists(path):
+            with open(path) as fp:
+                cached = json.load(fp)
+            if all(name in cached for name in RESULTS):   #not from an older table
+                results[i] = dict(cell, **cached)
+                continue
+        missing[key] = (cell, path, [i])
+
+    computed = runner.run_jobs(run_cell, [cell for cell, path, indexes \
+                                          in missing.values()], \
+                               (rounds, seed, floors, passengers), workers)
+    for (cell, path, indexes), result in zip(missing.values(), computed):
+        for i in indexes:
+            results[i] = dict(cells[i], **result)
+        if path:
+            with open(path + ".tmp", "w") as fp:
+                json.dump(result, fp)
+            os.replace(path + ".tmp", path)
+    return results
+
+
+def write_table(path, results):
+    with open(path, "w", newline='') as fp:
+        writer = csv.DictWriter(fp, PARAMETERS + RESULTS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def main(argv=None):
+    ''' Command-line entry point; returns the process exit code '''
+
+    parser = argparse.ArgumentParser(description="Sweep elevator parameters "
+                                     "and tabulate the averages per cell.")
+    parser.add_argument("--capacity", type=int, nargs="+", default=[10])
+    parser.add_argument("--elevator-speed", type=float, nargs="+", \
+                        default=workload.ELEVATOR_SPEEDS)
+    parser.add_argument("--loading-rate", type=float, nargs="+", \
+                        default=workload.LOADING_RATE)
+    parser.add_argument("--arrival-rate", type=float, nargs="+", default=[1])
+    parser.add_argument("--strategy", nargs="+", choices=sorted(engine.STRATEGIES),
+                        default=["strategy", "optimal"])
+    parser.add_argument("--sample", choices=["grid", "random", "latin"], \
+                        default="grid", help="how to pick cells (default grid)")
+    parser.add_argument("--cells", type=int, default=20, \
+                        help="cells to draw for random and latin sampling")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--floors", type=int, default=workload.FLOORS)
+    parser.add_argument("--passengers", type=int, default=workload.PASSENGERS)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--cache", default="sweep_cache", \
+                        help="cache directory, '' to disable")
+    parser.add_argument("--out", default="sweep.csv")
+    args = parser.parse_args(argv)
+    if args.rounds < 1 or args.cells < 1 or args.workers < 1 or \
+       args.floors < 1 or args.passengers < 1:
+        print("error: rounds, cells, workers, floors and passengers must be "
+              "positive", file=sys.stderr)
+        return 1
+
+    space = {"capacity": args.capacity, "elevator_speed": args.elevator_speed, \
+             "loading_rate": args.loading_rate, \
+             "arrival_rate": args.arrival_rate, "strategy": args.strategy}
+    if args.sample == "grid":
+        cells = grid(space)
+    else:
+        cells = sample(space, args.cells, args.sample, args.seed)
+
+    try:
+        results = run_sweep(cells, args.rounds, args.seed, args.floors, \
+                            args.passengers, args.workers, args.cache)
+        write_table(args.out, results)
+    except OSError as error:
+        print("error:", error, file=sys.stderr)
+        return 1
+
+    print(" {} cells written to {}".format(len(results), args.out))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+
+import numpy
+import pytest
+
+import bank
+import engine
+import runner
+import workload
+
+
+@pytest.mark.parametrize("dispatcher", sorted(bank.DISPATCHERS))
+@pytest.mark.parametrize("cars", [2, 3, 6])
+@pytest.mark.parametrize("name", sorted(engine.STRATEGIES))
+def test_bank_serves_everyone(name, cars, dispatcher):
+    runner.seed_round(3, 0)
+    passenger_list, speed, rate = workload.generate_passengers(20, 400)
+    simulation = bank.Bank(passenger_list, cars, 4, speed, rate, name, dispatcher)
+    tot_time, moves, waits = simulation.run()
+
+    table = simulation.passengers
+    assert not numpy.isnan(table.board_time).any()
+    assert (table.board_time >= table.arrival).all()
+    assert all(not car.halls and car.unboarded == 0 for car in simulation.cars)
+    if name == "random":
+        #the random elevator stops once everyone has boarded
+        assert waits.count <= len(table)
+        return
+    assert waits.count == len(table)
+    assert not numpy.isnan(table.alight_time).any()
+    assert tot_time == table.alight_time.max()
+    assert all(car.onboard_count == 0 for car in simulation.cars)
@@ -0,0 +1,50 @@
+
+import random
+
+import pytest
+
+import batch
+import engine
+import runner
+import workload
+
+
+def workloads(rounds, seed=7, floors=12, passengers=150):
+    result = []
+    for round_index in range(rounds):
+        runner.seed_round(seed, round_index)
+        result.append(workload.generate_passengers(floors, passengers))
+    return result
+
+
+@pytest.mark.parametrize("name", ["strategy", "optimal"])
+@pytest.mark.parametrize("capacity", [1, 5, 20])
+def test_batch_matches_engine(name, capacity):
+    '''Given the same random streams, every batched round ends exactly like
+    engine.Simulation'''
+
+    rounds = workloads(12)
+    rngs = [random.Random(key) for key in range(len(rounds))]
+    batched = batch.BatchSimulation(rounds, capacity, name, rngs=rngs).run()
+
+    for key, ((passenger_list, speed, rate), (tot_time, moves, waits)) in \
+            enumerate(zip(rounds, batched)):
+        random.seed(key)
+        expected = engine.Simulation(passenger_list, capacity, speed, rate, \
+                                     strategy=engine.STRATEGIES[name]()).run()
+        assert (tot_time, moves) == expected[:2]
+        assert waits.count == expected[2].count
+        assert waits.mean == pytest.approx(expected[2].mean, abs=1e-9)
+        assert (waits.min, waits.max) == (expected[2].min, expected[2].max)
+
+
+@pytest.mark.parametrize("name", batch.STRATEGIES)
+def test_batch_size_does_not_change_results(name):
+    rounds = workloads(10)
+    keys = list(range(100, 110))
+    whole = batch.BatchSimulation(rounds, 5, name, keys).run()
+    parts = batch.BatchSimulation(rounds[:3], 5, name, keys[:3]).run() + \
+            batch.BatchSimulation(rounds[3:], 5, name, keys[3:]).run()
+    for (time_a, moves_a, waits_a), (time_b, moves_b, waits_b) in zip(whole, parts):
+        assert (time_a, moves_a, waits_a.count) == (time_b, moves_b, waits_b.count)
+        assert waits_a.mean == pytest.approx(waits_b.mean, abs=1e-9)
@@ -0,0 +1,104 @@
+
+import pytest
+
+import runner
+import tracing
+
+
+ARGS = (3, 6, ["random", "strategy", "optimal"], tracing.MOVES)
+
+
+def interrupted_round(round_index, *args):
+    if round_index == 23:
+        raise KeyboardInterrupt
+    return runner.compare_round(round_index, *args)
+
+
+def comparison(tmp_path, name, round_function, resume=False):
+    tracer = tracing.Tracer(tracing.MOVES, str(tmp_path / name))
+    try:
+        return runner.run_comparison(round_function, 40, ARGS, 1, tracer, \
+                                     str(tmp_path / "run.checkpoint"), 10, resume)
+    finally:
+        tracer.close()
+
+
+def numbers(stats):
+    '''The statistics of each elevator, with its RunningStats as numbers'''
+    return [dict(elevator, wait_stats=vars(elevator["wait_stats"]) | \
+                 {"sketch": vars(elevator["wait_stats"].sketch)}) \
+            for elevator in stats]
+
+
+def test_resumed_run_equals_uninterrupted_run(tmp_path):
+    whole = comparison(tmp_path, "whole", runner.compare_round)
+
+    with pytest.raises(KeyboardInterrupt):
+        comparison(tmp_path, "resumed", interrupted_round)
+    assert (tmp_path / "run.checkpoint").exists()
+    resumed = comparison(tmp_path, "resumed", runner.compare_round, resume=True)
+    assert not (tmp_path / "run.checkpoint").exists()
+
+    assert resumed.rounds == whole.rounds == 40
+    assert numbers(resumed.stats()) == numbers(whole.stats())
+    for records in ("moves", "summary"):
+        assert (tmp_path / "resumed_{}.csv".format(records)).read_bytes() == \
+               (tmp_path / "whole_{}.csv".format(records)).read_bytes()
+
+
+def test_resume_rejects_a_different_run(tmp_path):
+    with pytest.raises(KeyboardInterrupt):
+        comparison(tmp_path, "resumed", interrupted_round)
+    tracer = tracing.Tracer(tracing.MOVES, str(tmp_path / "other"))
+    with pytest.raises(ValueError):
+        runner.run_comparison(runner.compare_round, 50, ARGS, 1, tracer, \
+                              str(tmp_path / "run.checkpoint"), 10, True)
+    tracer.close()
+
+
+def test_resume_rejects_a_different_stopping_rule(tmp_path):
+    checkpoint = str(tmp_path / "run.checkpoint")
+    tracer = tracing.Tracer(tracing.MOVES, str(tmp_path / "sequential"))
+    with pytest.raises(KeyboardInterrupt):
+        runner.run_comparison(interrupted_round, 40, ARGS, 1, tracer, \
+                              checkpoint, 10, sequential=True, precision=5, look=10)
+    tracer.close()
+    for stopping in ({}, {"sequential": True, "precision": 1, "look": 10}, \
+                     {"sequential": True, "precision": 5, "look": 20}):
+        tracer = tracing.Tracer(tracing.MOVES, str(tmp_path / "other"))
+        with pytest.raises(ValueError):
+            runner.run_comparison(runner.compare_round, 40, ARGS, 1, tracer, \
+                                  checkpoint, 10, True, **stopping)
+        tracer.close()
+
+
+def sequential_comparison(tmp_path, name, round_function, resume=False):
+    tracer = tracing.Tracer(tracing.MOVES, str(tmp_path / name))
+    try:
+        return runner.run_comparison(round_function, 400, ARGS, 1, tracer, \
+                                     str(tmp_path / "run.checkpoint"), 10, \
+                                     resume, sequential=True, look=10)
+    finally:
+        tracer.close()
+
+
+def test_sequential_run_stops_once_settled(tmp_path):
+    summary = sequential_comparison(tmp_path, "sequential", runner.compare_round)
+    assert runner.MIN_SETTLED <= summary.rounds < 400
+    assert summary.rounds % 10 == 0
+    assert summary.settled()
+    #the rounds used are the first rounds of a fixed-length run
+    whole = runner.run_comparison(runner.compare_round, summary.rounds, ARGS)
+    assert numbers(summary.stats()) == numbers(whole.stats())
+
+
+def test_resumed_sequential_run_equals_uninterrupted_run(tmp_path):
+    whole = sequential_comparison(tmp_path, "whole", runner.compare_round)
+    with pytest.raises(KeyboardInterrupt):
+        sequential_comparison(tmp_path, "resumed", interrupted_round)
+    resumed = sequential_comparison(tmp_path, "resumed", runner.compare_round, \
+                                    resume=True)
+    assert resumed.rounds == whole.rounds
+    assert numbers(resumed.stats()) == numbers(whole.stats())
+    assert (tmp_path / "resumed_summary.csv").read_bytes() == \
+           (tmp_path / "whole_summary.csv").read_bytes()
@@ -0,0 +1,46 @@
+
+import json
+
+import pytest
+
+import cli
+
+
+def config(tmp_path, values):
+    path = tmp_path / "run.json"
+    path.write_text(json.dumps(values))
+    return str(path)
+
+
+def test_config_values_are_converted_like_the_command_line(tmp_path):
+    options = cli.parse_args(["--config", config(tmp_path, \
+        {"seed": 4, "rounds": 20.0, "precision": 2, "sequential": True, \
+         "strategies": ["look", "optimal"]})])
+    assert options["seed"] == 4
+    assert options["rounds"] == 20 and isinstance(options["rounds"], int)
+    assert options["precision"] == 2.0 and isinstance(options["precision"], float)
+    assert options["sequential"] is True
+    assert options["strategies"] == ["look", "optimal"]
+
+
+def test_command_line_wins_over_config(tmp_path):
+    options = cli.parse_args(["--config", config(tmp_path, {"seed": 4, "rounds": 20}), \
+                              "--rounds", "5"])
+    assert (options["seed"], options["rounds"]) == (4, 5)
+
+
+@pytest.mark.parametrize("values", [{"seed": 1, "rounds": "many"}, \
+                                    {"seed": 1, "rounds": 2.5}, \
+                                    {"seed": 1, "sequential": "yes"}, \
+                                    {"seed": 1, "strategies": "optimal"}, \
+                                    {"seed": 1, "strategies": ["fastest"]}, \
+                                    {"seed": 1, "capacity": None}, \
+                                    {"seed": 1, "floors": 10}])
+def test_bad_config_values_are_refused(tmp_path, values):
+    with pytest.raises(ValueError):
+        cli.parse_args(["--config", config(tmp_path, values)])
+
+
+def test_bad_config_is_an_error_exit(tmp_path, capsys):
+    assert cli.main(["--config", config(tmp_path, {"rounds": 3})]) == 1
+    assert capsys.readouterr().err.startswith("error:")
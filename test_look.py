@@ -0,0 +1,49 @@
+
+import numpy
+import pytest
+
+import bank
+import engine
+import runner
+import workload
+
+
+def passengers(seed, floors=25, count=300):
+    runner.seed_round(seed, 0)
+    return workload.generate_passengers(floors, count)
+
+
+@pytest.mark.parametrize("capacity", [1, 3, 10])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_look_serves_everyone_in_order(seed, capacity):
+    passenger_list, speed, rate = passengers(seed)
+    simulation = engine.Simulation(passenger_list, capacity, speed, rate, \
+                                   strategy=engine.LookStrategy())
+    tot_time, moves, waits = simulation.run()
+
+    table = simulation.passengers
+    assert waits.count == len(table)
+    assert not numpy.isnan(table.alight_time).any()
+    assert (table.board_time >= table.arrival).all()
+    assert (table.alight_time > table.board_time).all()
+    assert tot_time == table.alight_time.max()
+    #everyone boarded going their own way, so nobody is left in the bitsets
+    assert simulation.up_calls == simulation.down_calls == 0
+    assert simulation.car_calls == simulation.waiting_floors == 0
+
+
+@pytest.mark.parametrize("capacity", [1, 5, 12])
+@pytest.mark.parametrize("seed, loading_rate", [(4, None), (5, 0.0), (6, 1.5)])
+@pytest.mark.parametrize("name", sorted(engine.STRATEGIES))
+def test_one_car_bank_equals_single_car(name, seed, loading_rate, capacity):
+    passenger_list, speed, rate = passengers(seed, floors=15)
+    if loading_rate is not None:
+        rate = loading_rate
+    runner.seed_round(seed, 1)
+    single = engine.Simulation(passenger_list, capacity, speed, rate, \
+                               strategy=engine.STRATEGIES[name]()).run()
+    runner.seed_round(seed, 1)
+    banked = bank.Bank(passenger_list, 1, capacity, speed, rate, name).run()
+    assert single[:2] == banked[:2]
+    assert single[2].count == banked[2].count
+    assert single[2].mean == banked[2].mean
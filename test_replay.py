@@ -0,0 +1,60 @@
+
+import numpy
+import pytest
+
+import engine
+import replay
+import runner
+import workload
+
+
+@pytest.fixture
+def logs(tmp_path):
+    '''The same traffic as a CSV log (with a header) and a binary log'''
+
+    runner.seed_round(5, 0)
+    table = workload.generate_passengers(15, 400)[0]
+    csv_path = str(tmp_path / "traffic.csv")
+    with open(csv_path, "w") as fp:
+        print("arrival_time,source_floor,destination_floor", file=fp)
+        for row in table:
+            print("{!r},{},{}".format(*row), file=fp)
+    binary_path = str(tmp_path / "traffic.log")
+    assert replay.convert(csv_path, binary_path) == len(table)
+    return table, csv_path, binary_path
+
+
+def test_binary_and_csv_logs_hold_the_same_rows(logs):
+    table, csv_path, binary_path = logs
+    for loaded in (replay.load(csv_path), replay.load(binary_path), \
+                   replay.load(binary_path, check=True)):
+        assert numpy.array_equal(loaded.arrival, table.arrival)
+        assert numpy.array_equal(loaded.source, table.source)
+        assert numpy.array_equal(loaded.destination, table.destination)
+
+
+@pytest.mark.parametrize("name", sorted(engine.STRATEGIES))
+def test_binary_and_csv_logs_replay_the_same(logs, name):
+    table, csv_path, binary_path = logs
+    results = []
+    for path in (csv_path, binary_path):
+        runner.seed_round(1, 0)
+        results.append(engine.Simulation(replay.load(path), 6, 1, 0.3, \
+                                         strategy=engine.STRATEGIES[name]()).run())
+    (time_a, moves_a, waits_a), (time_b, moves_b, waits_b) = results
+    assert (time_a, moves_a) == (time_b, moves_b)
+    assert vars(waits_a) | {"sketch": None} == vars(waits_b) | {"sketch": None}
+
+
+def test_binary_log_opens_without_per_row_columns(logs):
+    table, csv_path, binary_path = logs
+    loaded = replay.load(binary_path)
+    assert isinstance(loaded.arrival.base, numpy.memmap) or \
+           isinstance(loaded.arrival, numpy.memmap)
+    assert loaded.nbytes == 16 * len(table)   #only the mapped columns
+
+
+def test_out_of_order_logs_are_refused(tmp_path):
+    path = str(tmp_path / "unsorted.log")
+    with pytest.raises(ValueError):
+        replay.write_binary(path, [(5.0, 1, 2), (3.0, 2, 1)])
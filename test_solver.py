@@ -0,0 +1,25 @@
+
+import pytest
+
+import engine
+import runner
+import solver
+import workload
+
+
+@pytest.mark.parametrize("capacity", [1, 3])
+@pytest.mark.parametrize("seed", range(8))
+def test_solver_bounds_every_elevator(seed, capacity):
+    runner.seed_round(seed, 0)
+    passenger_list, speed, rate = workload.generate_passengers(5, 6)
+    lower_bound = solver.Solver(passenger_list, capacity, speed, rate).root_bound()
+    for name in engine.STRATEGIES:
+        average, total = solver.heuristic_waits(name, passenger_list, capacity, \
+                                                speed, rate)
+        assert lower_bound <= average + 1e-9
+        if name in solver.COLLECTIVE:
+            search = solver.Solver(passenger_list, capacity, speed, rate, \
+                                   solver.COLLECTIVE[name])
+            best = search.solve(budget=30)
+            assert search.proven
+            assert search.root_bound() <= best + 1e-9 <= average + 2e-9
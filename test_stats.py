@@ -0,0 +1,73 @@
+
+import numpy
+import pytest
+
+import runner
+import stats
+
+
+def values(seed=0, count=2000):
+    return numpy.random.RandomState(seed).exponential(40.0, count)
+
+
+def assert_matches_numpy(running, data):
+    assert running.count == len(data)
+    assert running.mean == pytest.approx(data.mean(), rel=1e-12)
+    assert running.variance == pytest.approx(data.var(ddof=1), rel=1e-9)
+    assert (running.min, running.max) == (data.min(), data.max())
+    for q in (0.5, 0.95, 0.99):
+        #the value at the rank below, to within the sketch's accuracy
+        assert running.quantile(q) == pytest.approx(\
+            numpy.quantile(data, q, method="lower"), rel=0.01)
+
+
+def test_add_extend_and_merge_match_numpy():
+    data = values()
+    added = stats.RunningStats()
+    for value in data:
+        added.add(value)
+    extended = stats.RunningStats()
+    extended.extend(data[:700])
+    extended.extend(data[700:])
+    merged = stats.RunningStats()
+    for part in numpy.array_split(data, 7):
+        piece = stats.RunningStats()
+        piece.extend(part)
+        merged.merge(piece)
+    for running in (added, extended, merged):
+        assert_matches_numpy(running, data)
+
+
+def test_merging_empty_statistics_changes_nothing():
+    data = values(1, 50)
+    running = stats.RunningStats()
+    running.merge(stats.RunningStats())
+    running.extend(data)
+    running.extend([])
+    running.merge(stats.RunningStats())
+    assert_matches_numpy(running, data)
+
+
+def test_empty_statistics_are_zero():
+    empty = stats.RunningStats()
+    assert (empty.count, empty.mean, empty.variance, empty.std) == (0, 0, 0, 0)
+    assert empty.quantile(0.5) == empty.quantile(0.99) == 0
+
+
+@pytest.mark.parametrize("df, expected", [(1, 12.7062), (2, 4.3027), \
+                                          (10, 2.2281), (29, 2.0452), \
+                                          (30, 2.0423), (120, 1.9799)])
+def test_t_quantiles_match_tables(df, expected):
+    assert stats.t_quantile(0.975, df) == pytest.approx(expected, abs=1e-4)
+    assert stats.t_quantile(0.025, df) == pytest.approx(-expected, abs=1e-4)
+
+
+def test_paired_interval_covers_the_mean_difference():
+    summary = runner.Summary()
+    for round_index in range(40):
+        summary.add(runner.compare_round(round_index, 2, 6, \
+                                         ["strategy", "optimal"])[0])
+    paired = summary.stats()[1]["paired"]["waits"]
+    assert paired["low"] < paired["mean"] < paired["high"]
+    #common random numbers: pairing cancels the shared traffic
+    assert (paired["high"] - paired["low"]) / 2 < paired["unpaired"]
@@ -0,0 +1,193 @@
+
+import csv
+import sys
+
+
+# Trace levels
+OFF = 0      # record nothing
+SUMMARY = 1  # one row per simulation run
+MOVES = 2    # plus one row per elevator move
+
+LEVELS = {"off": OFF, "summary": SUMMARY, "moves": MOVES}
+
+MOVE_FIELDS = ("run", "elevator", "floor", "t_b4_load", "load_t", "onboard", \
+               "t_after_load", "src_floor", "dst_floor", "move_t", \
+               "t_after_move", "picked_up", "exiting", "unload_t", \
+               "t_after_exit")
+SUMMARY_FIELDS = ("run", "elevator", "total_time", "moves", "avg_wait_time", \
+                  "delivered")
+
+
+class Tracer:
+    '''Collects simulation trace records.
+
+    Records are plain tuples laid out as MOVE_FIELDS and SUMMARY_FIELDS.
+    With a path they are appended in batches to <path>_moves.csv and
+    <path>_summary.csv; without one they stay in memory until taken with
+    records(), which is how worker processes hand their records back.
+    Check the moves and summary flags before building a record so a
+    disabled level costs nothing.
+    '''
+
+    def __init__(self, level=SUMMARY, path=None, batch=10000):
+        self.path = path
+        self.batch = batch
+        self.run = ""
+        self.move_rows = []
+        self.summary_rows = []
+        self.files = {}
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.moves = level >= MOVES
+        self.summary = level >= SUMMARY
+
+    def add_move(self, row):
+        self.move_rows.append(row)
+        if self.path and len(self.move_rows) >= self.batch:
+            self.flush()
+
+    def add_summary(self, row):
+        self.summary_rows.append(row)
+        if self.path and len(self.summary_rows) >= self.batch:
+            self.flush()
+
+    def extend(self, records):
+        '''Add records taken from another tracer'''
+        move_rows, summary_rows = records
+        self.move_rows.extend(move_rows)
+        self.summary_rows.extend(summary_rows)
+        if self.path and len(self.move_rows) + len(self.summary_rows) >= self.batch:
+            self.flush()
+
+    def records(self):
+        '''Take the records collected so far'''
+        records = self.move_rows, self.summary_rows
+        self.move_rows = []
+        self.summary_rows = []
+        return records
+
+    def flush(self):
+        for name, fields, rows in (("moves", MOVE_FIELDS, self.move_rows), \
+                                   ("summary", SUMMARY_FIELDS, self.summary_rows)):
+            if not rows:
+                continue
+            if name not in self.files:
+                fp = open("{}_{}.csv".format(self.path, name), "w", newline='')
+                writer = csv.writer(fp)
+                writer.writerow(fields)
+                self.files[name] = fp, writer
+            self.files[name][1].writerows(rows)
+            rows.clear()
+
+    def positions(self):
+        '''Write out everything recorded so far and return how far each
+        record file has got, for resume()'''
+
+        if self.path:
+            self.flush()
+        for fp, writer in self.files.values():
+            fp.flush()
+        return {name: fp.tell() for name, (fp, writer) in self.files.items()}
+
+    def resume(self, positions):
+        '''Carry on writing record files from positions(), dropping any
+        records written after that point'''
+
+        for name, position in positions.items():
+            fp = open("{}_{}.csv".format(self.path, name), "r+", newline='')
+            fp.truncate(position)
+            fp.seek(position)
+            self.files[name] = fp, csv.writer(fp)
+
+    def close(self):
+        if self.path:
+            self.flush()
+        for fp, writer in self.files.values():
+            fp.close()
+        self.files = {}
+
+
+def _read(path, name):
+    try:
+        fp = open("{}_{}.csv".format(path, name), newline='')
+    except FileNotFoundError:
+        return
+    with fp:
+        reader = csv.reader(fp)
+        next(reader)
+        yield from reader
+
+
+def render(path, fp):
+    '''Write the human-readable trace for the records at path to fp'''
+
+    print(file=fp)
+    print("--"*50, file=fp)
+    print(file=fp)
+    print("---"*9, "Real-time Elevator Simulation", "---"*14, file=fp)
+    print(file=fp)
+    print("--"*50, file=fp)
+    print(file=fp)
+    print("NOTE: time(seconds) is represented as t", \
+          "passenger is represented as p", file=fp)
+
+    moves = _read(path, "moves")
+    row = next(moves, None)
+    for summary in _read(path, "summary"):
+        run, elevator, total_time, elevator_moves, avg_wait_time, delivered \
+            = summary
+        name = elevator.upper()
+
+        print(file=fp)
+        print("--"*10, "BEGINNING OF {} ELEVATOR SIMULATION".format(name), \
+              "--"*10, file=fp)
+        print(" run:", run, file=fp)
+        print(file=fp)
+        print("{:<16s}{:<12s}".format("current floor|", "t b4 load|"), end='', file=fp)
+        print("{:<9s}{:<12s}".format("load t|", "p onboard|"), end='', file=fp)
+        print("{:<16s}".format("t after load|"), end='', file=fp)
+        print("{:<12s}{:<12s}{:<9s}".format("src floor|", "dst floor|", "move t|"),\
+              end='', file=fp)
+        print("{:<15s}".format("t after move|"), end='', file=fp)
+        print("{:<12s}{:<11s}{:<16s}".format("p exiting|", "unload t|", \
+              "t after exit|"), end='', file=fp)
+        print("{:<17s}".format("total t for move|"), file=fp)
+        print(file=fp)
+
+        while row is not None and row[0] == run and row[1] == elevator:
+            floor, t_b4_load, load_t, onboard, t_after_load, src_floor, \
+                dst_floor, move_t, t_after_move, picked_up, exiting, unload_t, \
+                t_after_exit = row[2:]
+            print("{:^16d}{:<12.2f}".format(int(floor), float(t_b4_load)), \
+                  end='', file=fp)
+            print("{:<9.2f}{:^12d}".format(float(load_t), int(onboard)), \
+                  end='', file=fp)
+            print("{:^16.2f}".format(float(t_after_load)), end='', file=fp)
+            print("{:^11d}{:^11d}{:^8.2f}".format(int(src_floor), \
+                  int(dst_floor), float(move_t)), end='', file=fp)
+            print("{:>14.2f}".format(float(t_after_move)), end='', file=fp)
+            print("{:>11d}{:>10.2f}{:>15.2f}".format(int(exiting), \
+                  float(unload_t), float(t_after_exit)), end='', file=fp)
+            print("{:>16.2f}".format(float(t_after_exit) - float(t_b4_load)), \
+                  file=fp)
+            row = next(moves, None)
+
+        print(file=fp)
+        print("average wait time: ", round(float(avg_wait_time), 3), file=fp)
+        print("Total time to deliver all passengers: {:.4f} seconds".format(\
+              float(total_time)), file=fp)
+        print("Total Number of elevator movements: ", elevator_moves, file=fp)
+        print(file=fp)
+        print("--"*10, "END OF {} ELEVATOR SIMULATION".format(name), "--"*10, \
+              file=fp)
+
+
+if __name__ == "__main__":
+    # python tracing.py single_run [single_run.txt]
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as out:
+            render(sys.argv[1], out)
+    else:
+        render(sys.argv[1], sys.stdout)
@@ -0,0 +1,132 @@
+
+import numpy
+
+from passengers import PassengerTable
+
+
+FLOORS = 20       # top floor, floors are numbered 0 to FLOORS
+PASSENGERS = 1000 # number of passengers per simulation run
+ELEVATOR_SPEEDS = [0.5, 1, 1.5, 2] # possible speeds of elevator (sec/floor)
+LOADING_RATE = [0.2, 0.3, 0.4] # possible speed of passenger to load and unload
+PEAK_RATE = 0.05  # passengers per second in a daily profile's busiest hour
+
+
+def _day(hours, office=(0.3, 0.1, 0.1), night=(0.02, 0.1, 0.1)):
+    '''24 hourly entries: office from 7:00 to 19:00, night otherwise, and
+    hours (hour -> entry) for the profile's own peaks'''
+    return [hours.get(hour, office if 7 <= hour < 19 else night) \
+            for hour in range(24)]
+
+
+# Daily traffic profiles. Each hour of the day has (rate, incoming,
+# outgoing): the arrival rate as a share of the peak rate, the share of
+# trips from the lobby up to a floor and the share from a floor down to the
+# lobby. The remaining trips are inter-floor, between uniform random floors
+# as in generate_workload.
+PROFILES = {
+    "uniform": [(1, 0, 0)] * 24,
+    "up_peak": _day({7: (0.6, 0.8, 0.05), 8: (1, 0.85, 0.05), \
+                     9: (0.7, 0.8, 0.05)}),
+    "down_peak": _day({16: (0.6, 0.05, 0.8), 17: (1, 0.05, 0.85), \
+                       18: (0.6, 0.05, 0.8)}),
+    "lunch": _day({11: (0.6, 0.3, 0.5), 12: (1, 0.45, 0.45), \
+                   13: (0.6, 0.5, 0.3)}),
+    "interfloor": _day({}, office=(1, 0.05, 0.05), night=(0.05, 0.05, 0.05)),
+    "office_day": _day({7: (0.6, 0.8, 0.05), 8: (1, 0.85, 0.05), \
+                        9: (0.7, 0.8, 0.05), 11: (0.5, 0.3, 0.5), \
+                        12: (0.7, 0.45, 0.45), 13: (0.5, 0.5, 0.3), \
+                        16: (0.6, 0.05, 0.8), 17: (1, 0.05, 0.85), \
+                        18: (0.6, 0.05, 0.8)}),
+}
+
+
+def generate_workload(floors=FLOORS, passengers=PASSENGERS, arrival_rate=1, \
+                      elevator_speeds=ELEVATOR_SPEEDS, loading_rates=LOADING_RATE,\
+                      rng=numpy.random):
+    '''Generate passenger data for one simulation run in batched NumPy calls.
+       Arrival gaps are Poisson with mean 1/arrival_rate seconds, source and
+       destination floors are uniform over 0..floors.
+       rng is numpy.random (the global seed) or a numpy.random.RandomState.
+       Return: arrival times, source floors, destination floors (arrays),
+       elevator speed (sec/floor), loading/unloading rate (sec/pass)
+    '''
+    elevator_speed = elevator_speeds[rng.randint(len(elevator_speeds))]
+    loading_rate = loading_rates[rng.randint(len(loading_rates))]
+
+    arrivals = numpy.cumsum(rng.poisson(1 / arrival_rate, passengers))
+    floor_pairs = rng.randint(0, floors + 1, (2, passengers))
+    return arrivals, floor_pairs[0], floor_pairs[1], elevator_speed, loading_rate
+
+
+def generate_passengers(floors=FLOORS, passengers=PASSENGERS, arrival_rate=1, \
+                        elevator_speeds=ELEVATOR_SPEEDS, loading_rates=LOADING_RATE,\
+                        rng=numpy.random):
+    '''Generate passenger data for one simulation run.
+       Rows of the table read as (arrival_time, source_floor, destination_floor)
+       Return: PassengerTable, elevator speed (sec/floor),
+       loading/unloading rate (sec/pass)
+    '''
+    arrivals, sources, destinations, elevator_speed, loading_rate = \
+        generate_workload(floors, passengers, arrival_rate, elevator_speeds, \
+                          loading_rates, rng)
+    return PassengerTable(arrivals, sources, destinations), elevator_speed, \
+           loading_rate
+
+
+def generate_profile_workload(profile="office_day", floors=FLOORS, peak_rate=PEAK_RATE, \
+                              lobby_bias=1, elevator_speeds=ELEVATOR_SPEEDS, \
+                              loading_rates=LOADING_RATE, rng=numpy.random):
+    '''Generate one day of passengers following a daily profile (a key of
+       PROFILES or a list of 24 (rate, incoming, outgoing) entries) in
+       batched NumPy calls. Arrivals are a Poisson process whose rate
+       changes every hour, peak_rate passengers per second at the profile's
+       peak. lobby_bias scales the share of trips to and from the lobby
+       (floor 0): 0 gives only inter-floor trips, 2 twice the profile's
+       lobby traffic.
+       Return: arrival times (seconds after midnight), source floors,
+       destination floors (arrays), elevator speed (sec/floor),
+       loading/unloading rate (sec/pass)
+    '''
+    hours = PROFILES[profile] if isinstance(profile, str) else profile
+    rate, incoming, outgoing = numpy.array(hours, dtype=float).T
+    incoming = incoming * lobby_bias
+    outgoing = outgoing * lobby_bias
+    lobby = incoming + outgoing
+    scale = numpy.where(lobby > 1, 1 / numpy.maximum(lobby, 1), 1)
+    incoming, outgoing = incoming * scale, outgoing * scale
+
+    elevator_speed = elevator_speeds[rng.randint(len(elevator_speeds))]
+    loading_rate = loading_rates[rng.randint(len(loading_rates))]
+
+    counts = rng.poisson(rate * peak_rate * 3600)
+    hour = numpy.repeat(numpy.arange(len(hours)), counts)
+    #every hour's arrivals fall inside the hour, so sorting keeps them in
+    #step with hour
+    arrivals = numpy.sort((hour + rng.uniform(size=len(hour))) * 3600)
+
+    trip = rng.uniform(size=len(hour))
+    going_up = trip < incoming[hour]
+    going_down = ~going_up & (trip < incoming[hour] + outgoing[hour])
+    sources = rng.randint(0, floors + 1, len(hour))
+    destinations = rng.randint(0, floors + 1, len(hour))
+    upper = rng.randint(1, floors + 1, len(hour))
+    sources[going_up] = 0
+    destinations[going_up] = upper[going_up]
+    sources[going_down] = upper[going_down]
+    destinations[going_down] = 0
+    return arrivals, sources, destinations, elevator_speed, loading_rate
+
+
+def generate_profile_passengers(profile="office_day", floors=FLOORS, \
+                                peak_rate=PEAK_RATE, \
+                                lobby_bias=1, elevator_speeds=ELEVATOR_SPEEDS, \
+                                loading_rates=LOADING_RATE, rng=numpy.random):
+    '''generate_profile_workload as a PassengerTable, like generate_passengers
+       Return: PassengerTable, elevator speed (sec/floor),
+       loading/unloading rate (sec/pass)
+    '''
+    arrivals, sources, destinations, elevator_speed, loading_rate = \
+        generate_profile_workload(profile, floors, peak_rate, lobby_bias, \
+                                  elevator_speeds, loading_rates, rng)
+    return PassengerTable(arrivals, sources, destinations), elevator_speed, \
+           loading_rate